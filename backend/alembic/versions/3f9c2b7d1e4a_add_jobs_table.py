@@ -0,0 +1,37 @@
+"""Add jobs table
+
+Revision ID: 3f9c2b7d1e4a
+Revises: a661036b4417
+Create Date: 2026-10-18 10:12:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2b7d1e4a'
+down_revision = 'a661036b4417'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id')),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('video', sa.String(length=255), nullable=False),
+    sa.Column('subtitle', sa.String(length=255), nullable=False),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_status', 'jobs', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_jobs_status', table_name='jobs')
+    op.drop_table('jobs')
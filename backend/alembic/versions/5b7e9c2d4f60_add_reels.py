@@ -0,0 +1,33 @@
+"""Add reels cache
+
+Revision ID: 5b7e9c2d4f60
+Revises: 8d4e6a1b2c3f
+Create Date: 2026-10-18 14:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e9c2d4f60'
+down_revision = '8d4e6a1b2c3f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('reels',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('segments', sa.Text(), nullable=False),
+    sa.Column('time', sa.String(length=100), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('reels')
@@ -0,0 +1,24 @@
+"""Index segments by user and id for keyset pages
+
+Revision ID: 7a3c5e1d9b42
+Revises: e2d8b6a47f13
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3c5e1d9b42'
+down_revision = 'e2d8b6a47f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_segments_user_id_id', 'segments', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_segments_user_id_id', table_name='segments')
@@ -0,0 +1,33 @@
+"""Add stored files and job config key
+
+Revision ID: 8d4e6a1b2c3f
+Revises: 3f9c2b7d1e4a
+Create Date: 2026-10-18 11:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d4e6a1b2c3f'
+down_revision = '3f9c2b7d1e4a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('stored_files',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('sha256'),
+    sa.UniqueConstraint('filename')
+    )
+    op.add_column('jobs', sa.Column('config_key', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('jobs', 'config_key')
+    op.drop_table('stored_files')
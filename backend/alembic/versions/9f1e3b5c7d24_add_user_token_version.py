@@ -0,0 +1,24 @@
+"""Add user token version
+
+Revision ID: 9f1e3b5c7d24
+Revises: 7a3c5e1d9b42
+Create Date: 2026-10-18 20:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9f1e3b5c7d24'
+down_revision = '7a3c5e1d9b42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
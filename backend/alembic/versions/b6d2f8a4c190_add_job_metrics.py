@@ -0,0 +1,24 @@
+"""Add job metrics
+
+Revision ID: b6d2f8a4c190
+Revises: 9f1e3b5c7d24
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d2f8a4c190'
+down_revision = '9f1e3b5c7d24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('jobs', sa.Column('metrics', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('jobs', 'metrics')
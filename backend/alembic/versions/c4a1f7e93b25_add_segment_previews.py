@@ -0,0 +1,28 @@
+"""Add segment previews
+
+Revision ID: c4a1f7e93b25
+Revises: 5b7e9c2d4f60
+Create Date: 2026-10-18 16:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a1f7e93b25'
+down_revision = '5b7e9c2d4f60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('segments', sa.Column('proxy', sa.String(length=255), nullable=True))
+    op.add_column('segments', sa.Column('sprite', sa.String(length=255), nullable=True))
+    op.add_column('segments', sa.Column('sprite_index', sa.String(length=255), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('segments', 'sprite_index')
+    op.drop_column('segments', 'sprite')
+    op.drop_column('segments', 'proxy')
@@ -0,0 +1,30 @@
+"""Add segment job id
+
+Revision ID: d3a7c1f5e826
+Revises: b6d2f8a4c190
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a7c1f5e826'
+down_revision = 'b6d2f8a4c190'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('segments') as batch_op:
+        batch_op.add_column(sa.Column('job_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_segments_job_id_jobs', 'jobs', ['job_id'], ['id'])
+        batch_op.create_index('ix_segments_job_id_id', ['job_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('segments') as batch_op:
+        batch_op.drop_index('ix_segments_job_id_id')
+        batch_op.drop_constraint('fk_segments_job_id_jobs', type_='foreignkey')
+        batch_op.drop_column('job_id')
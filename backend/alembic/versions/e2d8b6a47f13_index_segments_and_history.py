@@ -0,0 +1,28 @@
+"""Index segments and edit history lookups
+
+Revision ID: e2d8b6a47f13
+Revises: c4a1f7e93b25
+Create Date: 2026-10-18 18:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2d8b6a47f13'
+down_revision = 'c4a1f7e93b25'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_segments_user_id_video', 'segments', ['user_id', 'video'], unique=False)
+    op.create_index('ix_segments_video', 'segments', ['video'], unique=False)
+    op.create_index('ix_edit_history_user_id_id', 'edit_history', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_edit_history_user_id_id', table_name='edit_history')
+    op.drop_index('ix_segments_video', table_name='segments')
+    op.drop_index('ix_segments_user_id_video', table_name='segments')
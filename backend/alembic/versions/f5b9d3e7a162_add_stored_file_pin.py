@@ -0,0 +1,24 @@
+"""Add stored file pin
+
+Revision ID: f5b9d3e7a162
+Revises: d3a7c1f5e826
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5b9d3e7a162'
+down_revision = 'd3a7c1f5e826'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('stored_files', sa.Column('pinned_until', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('stored_files', 'pinned_until')
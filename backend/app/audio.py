@@ -0,0 +1,99 @@
+import os
+import subprocess
+import time
+import uuid
+import numpy as np
+from dotenv import load_dotenv
+from .clips import FFMPEG_PATH
+from . import metrics
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.getenv("CACHE_DIR") or os.path.join(BASE_DIR, "..", "cache")
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR") or os.path.join(CACHE_DIR, "audio")
+AUDIO_ENABLED = os.getenv("AUDIO_ENABLED", "1") == "1"
+# Mono PCM at this rate is plenty for crowd loudness and onsets
+AUDIO_SAMPLE_RATE = int(os.getenv("AUDIO_SAMPLE_RATE", "8000"))
+AUDIO_FRAME_SIZE = 512  # samples per spectral-flux frame (64 ms at 8 kHz)
+# Each feature is scaled by this percentile of the whole video, so "loud" is relative to the match
+AUDIO_NORMALIZE_PERCENTILE = 95
+
+
+def stream_pcm(input_file, block_samples=AUDIO_SAMPLE_RATE):
+    """Yields float32 blocks of mono PCM decoded by ffmpeg over a pipe; memory stays at one block."""
+    command = [FFMPEG_PATH, "-hide_banner", "-loglevel", "error", "-i", input_file,
+               "-vn", "-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE), "-f", "s16le", "-"]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    try:
+        while True:
+            data = process.stdout.read(block_samples * 2)
+            if len(data) < 2:
+                break
+            yield np.frombuffer(data[:len(data) // 2 * 2], dtype="<i2").astype(np.float32) / 32768.0
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command)
+
+
+def compute_envelope(input_file):
+    """Per-second (RMS, spectral flux) of the audio track as a float32 array of shape (seconds, 2)."""
+    window = np.hanning(AUDIO_FRAME_SIZE).astype(np.float32)
+    previous = None
+    rows = []
+    for samples in stream_pcm(input_file):
+        rms = float(np.sqrt(np.mean(samples ** 2)))
+        frames = len(samples) // AUDIO_FRAME_SIZE
+        flux = 0.0
+        if frames:
+            magnitudes = np.abs(np.fft.rfft(samples[:frames * AUDIO_FRAME_SIZE].reshape(frames, AUDIO_FRAME_SIZE) * window, axis=1))
+            # Flux carries over block boundaries: the first frame is compared with the previous block's last
+            earlier = np.vstack([magnitudes[:1] if previous is None else previous[None], magnitudes[:-1]])
+            flux = float(np.maximum(magnitudes - earlier, 0).sum(axis=1).mean())
+            previous = magnitudes[-1]
+        rows.append((rms, flux))
+    return np.asarray(rows, dtype=np.float32).reshape(-1, 2)
+
+
+def _envelope_path(source_hash):
+    return os.path.join(AUDIO_CACHE_DIR, f"{source_hash}_{AUDIO_SAMPLE_RATE}_{AUDIO_FRAME_SIZE}.npy")
+
+
+def load_envelope(input_file, source_hash=None):
+    """Returns the cached envelope memory-mapped from disk, computing and caching it on first use."""
+    if source_hash is None:
+        return compute_envelope(input_file)
+    path = _envelope_path(source_hash)
+    if not os.path.exists(path):
+        envelope = compute_envelope(input_file)
+        os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            np.save(f, envelope)
+        os.replace(temp_path, path)
+    return np.load(path, mmap_mode="r")
+
+
+def crowd_energy(envelope):
+    """Per-second crowd-noise score in [0, 1]: the mean of RMS and spectral flux, each scaled to the video."""
+    envelope = np.asarray(envelope, dtype=np.float32)
+    if len(envelope) == 0:
+        return np.zeros(0, dtype=np.float32)
+    scale = np.percentile(envelope, AUDIO_NORMALIZE_PERCENTILE, axis=0)
+    scaled = np.clip(envelope / np.where(scale > 0, scale, 1), 0, 1)
+    return scaled.mean(axis=1).astype(np.float32)
+
+
+def load_crowd_energy(input_file, source_hash=None):
+    """Crowd-noise score per second of a video, or None when it has no usable audio."""
+    start_time = time.time()
+    try:
+        with metrics.timer("highlighter_stage_seconds", stage="audio"):
+            energy = crowd_energy(load_envelope(input_file, source_hash))
+    except (subprocess.CalledProcessError, OSError, ValueError) as e:
+        print(f"Audio analysis unavailable: {e}")
+        return None
+    print(f"Audio analysis completed: {len(energy)} seconds. (Time: {time.time() - start_time:.2f} sec)")
+    return energy if len(energy) else None
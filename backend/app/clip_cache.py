@@ -0,0 +1,119 @@
+import glob
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.getenv("CACHE_DIR") or os.path.join(BASE_DIR, "..", "cache")
+CLIP_CACHE_DIR = os.getenv("CLIP_CACHE_DIR") or os.path.join(CACHE_DIR, "clips")
+CLIP_CACHE_ENABLED = os.getenv("CLIP_CACHE_ENABLED", "1") == "1"
+CLIP_CACHE_MAX_BYTES = int(os.getenv("CLIP_CACHE_MAX_BYTES", str(20 * 1024 ** 3)))
+
+
+def clip_key(source_hash, start_ms, end_ms, profile):
+    """Identity of an encoded clip: which content, which interval, which encoding."""
+    return hashlib.sha256(f"{source_hash}:{int(start_ms)}:{int(end_ms)}:{profile}".encode("utf-8")).hexdigest()
+
+
+def link_or_copy(source, destination):
+    """Hard-links when possible so cache and static copies share disk blocks; copies across filesystems."""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+class ClipCache:
+    """Encoded clips shared across jobs and users, evicted least-recently-used past a disk budget.
+
+    Clips handed out are hard links, so evicting a cache entry never removes a user's segment file.
+    """
+
+    def __init__(self, directory=CLIP_CACHE_DIR, max_bytes=CLIP_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+
+    def _connection(self):
+        # A connection must not be shared with forked worker processes, so reopen after a fork
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(self.directory, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.directory, "index.sqlite3"), check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS clips (key TEXT PRIMARY KEY, size INTEGER NOT NULL, last_used REAL NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_clips_last_used ON clips (last_used)")
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.mp4")
+
+    def _companion(self, key, suffix):
+        return os.path.join(self.directory, f"{key}{suffix}")
+
+    def fetch(self, key, output_file, companions=()):
+        """Places the cached clip at output_file; returns False on a miss.
+
+        Companion files (e.g. "_proxy.mp4") cached with the clip are placed next to output_file under the same suffix.
+        """
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT key FROM clips WHERE key = ?", (key,)).fetchone()
+            if row is None or not os.path.exists(self._path(key)):
+                self.misses += 1
+                return False
+            link_or_copy(self._path(key), output_file)
+            stem = os.path.splitext(output_file)[0]
+            for suffix in companions:
+                if os.path.exists(self._companion(key, suffix)):
+                    link_or_copy(self._companion(key, suffix), f"{stem}{suffix}")
+            conn.execute("UPDATE clips SET last_used = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+            self.hits += 1
+            return True
+
+    def store(self, key, clip_file, companions=()):
+        """Adds a freshly encoded clip and its companion files, then evicts the least recently used clips beyond the budget."""
+        with self._lock:
+            conn = self._connection()
+            path = self._path(key)
+            if not os.path.exists(path):
+                link_or_copy(clip_file, path)
+            size = os.path.getsize(path)
+            stem = os.path.splitext(clip_file)[0]
+            for suffix in companions:
+                companion = self._companion(key, suffix)
+                if not os.path.exists(companion) and os.path.exists(f"{stem}{suffix}"):
+                    link_or_copy(f"{stem}{suffix}", companion)
+                if os.path.exists(companion):
+                    size += os.path.getsize(companion)
+            conn.execute("INSERT OR REPLACE INTO clips (key, size, last_used) VALUES (?, ?, ?)",
+                         (key, size, time.time()))
+
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM clips").fetchone()[0]
+            if total > self.max_bytes:
+                for old_key, size in conn.execute("SELECT key, size FROM clips ORDER BY last_used").fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    for cached_file in [self._path(old_key), *glob.glob(self._companion(old_key, "_*"))]:
+                        if os.path.exists(cached_file):
+                            os.remove(cached_file)
+                    conn.execute("DELETE FROM clips WHERE key = ?", (old_key,))
+                    total -= size
+            conn.commit()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+cache = ClipCache() if CLIP_CACHE_ENABLED else None
@@ -0,0 +1,374 @@
+import json
+import math
+import os
+import subprocess
+import tempfile
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from . import clip_cache
+from . import metrics
+from .clip_cache import clip_key
+
+load_dotenv()
+
+FFMPEG_PATH = os.getenv("FFMPEG_PATH") or r"C:\\ProgramData\\chocolatey\\bin\\ffmpeg.exe"
+FFPROBE_PATH = os.getenv("FFPROBE_PATH") or os.path.join(os.path.dirname(FFMPEG_PATH), "ffprobe" + os.path.splitext(FFMPEG_PATH)[1])
+
+# "reencode" re-encodes the whole clip, "copy" snaps to keyframes and never re-encodes (previews),
+# "single_pass" decodes the source once and writes every clip from one ffmpeg process
+CLIP_MODE = os.getenv("CLIP_MODE", "reencode")
+# Encoder threads per ffmpeg process; the worker pool runs cores // FFMPEG_THREADS processes at once
+FFMPEG_THREADS = int(os.getenv("FFMPEG_THREADS", "2"))
+CLIP_WORKERS = int(os.getenv("CLIP_WORKERS", "0"))  # 0 = derive from available cores
+PROFILE_ARGS = ["-c:v", "libx264", "-c:a", "aac"]
+VIDEO_ENCODE_ARGS = ["-c:v", "libx264", "-threads", str(FFMPEG_THREADS)]
+ENCODE_ARGS = [*VIDEO_ENCODE_ARGS, "-c:a", "aac"]
+
+# Low-bitrate proxy and thumbnail sprite written next to every clip, for previewing without the full-res file
+PREVIEWS_ENABLED = os.getenv("PREVIEWS_ENABLED", "1") == "1"
+PROXY_HEIGHT = int(os.getenv("PROXY_HEIGHT", "360"))
+PROXY_ENCODE_ARGS = ["-c:v", "libx264", "-preset", "veryfast", "-crf", "30", "-maxrate", "600k", "-bufsize", "1200k",
+                     "-threads", str(FFMPEG_THREADS), "-c:a", "aac", "-b:a", "64k", "-movflags", "+faststart"]
+SPRITE_INTERVAL = float(os.getenv("SPRITE_INTERVAL", "1.0"))  # seconds between thumbnails
+SPRITE_THUMB_WIDTH, SPRITE_THUMB_HEIGHT = 160, 90
+SPRITE_COLUMNS = 10
+SPRITE_MAX_THUMBS = 100
+PREVIEW_SUFFIXES = ("_proxy.mp4", "_sprite.jpg", "_sprite.json")
+
+ClipResult = namedtuple("ClipResult", ["index", "start", "end", "path", "time", "error", "previews"], defaults=(None,))
+Previews = namedtuple("Previews", ["proxy", "sprite", "sprite_index"])
+ClipBatch = namedtuple("ClipBatch", ["results", "total_time"])
+
+
+def run_ffmpeg(args):
+    subprocess.run([FFMPEG_PATH, "-hide_banner", "-loglevel", "error", *args], check=True)
+
+
+def has_audio(input_file):
+    command = [FFPROBE_PATH, "-v", "error", "-select_streams", "a", "-show_entries", "stream=index", "-of", "csv=p=0", input_file]
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+    return bool(result.stdout.strip())
+
+
+def probe_duration_ms(input_file):
+    """Container duration in whole milliseconds, or None when ffprobe cannot tell."""
+    command = [FFPROBE_PATH, "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", input_file]
+    try:
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+        return int(float(result.stdout.strip()) * 1000)
+    except (subprocess.CalledProcessError, OSError, ValueError):
+        return None
+
+
+def preview_paths(clip_file):
+    stem = os.path.splitext(clip_file)[0]
+    return Previews(*(f"{stem}{suffix}" for suffix in PREVIEW_SUFFIXES))
+
+
+def sprite_layout(duration):
+    """Returns (interval, count, columns, rows); long clips get sparser thumbnails instead of bigger sheets."""
+    interval = max(SPRITE_INTERVAL, duration / SPRITE_MAX_THUMBS)
+    count = max(1, math.ceil(duration / interval))
+    columns = min(SPRITE_COLUMNS, count)
+    return interval, count, columns, math.ceil(count / columns)
+
+
+def preview_graph(duration, previews, video_in, video_out=None, audio_in=None, audio_out=None, tag=""):
+    """Filter graph lines and output args writing the proxy and sprite from an already decoded video stream.
+
+    With video_out (and audio_out) the decoded streams are also passed on for the full-resolution clip,
+    so all three files come from one decode.
+    """
+    interval, _, columns, rows = sprite_layout(duration)
+    graph = [
+        f"{video_in}split={3 if video_out else 2}{video_out or ''}[pv{tag}][tv{tag}]",
+        f"[pv{tag}]scale=-2:{PROXY_HEIGHT}[proxy{tag}]",
+        f"[tv{tag}]fps={1 / interval:.6f},"
+        f"scale={SPRITE_THUMB_WIDTH}:{SPRITE_THUMB_HEIGHT}:force_original_aspect_ratio=decrease,"
+        f"pad={SPRITE_THUMB_WIDTH}:{SPRITE_THUMB_HEIGHT}:(ow-iw)/2:(oh-ih)/2,tile={columns}x{rows}[sprite{tag}]",
+    ]
+    audio_map = []
+    if audio_in and audio_out:
+        graph.append(f"{audio_in}asplit=2{audio_out}[pa{tag}]")
+        audio_map = ["-map", f"[pa{tag}]"]
+    elif audio_in:
+        audio_map = ["-map", audio_in]
+
+    outputs = ["-map", f"[proxy{tag}]", *audio_map, *PROXY_ENCODE_ARGS, "-y", previews.proxy,
+               "-map", f"[sprite{tag}]", "-frames:v", "1", "-q:v", "5", "-y", previews.sprite]
+    return graph, outputs
+
+
+def write_sprite_index(previews, duration):
+    """JSON index of the sprite sheet: where each thumbnail sits and which clip time it shows."""
+    interval, count, columns, rows = sprite_layout(duration)
+    index = {
+        "interval": interval,
+        "width": SPRITE_THUMB_WIDTH,
+        "height": SPRITE_THUMB_HEIGHT,
+        "columns": columns,
+        "rows": rows,
+        "thumbnails": [
+            {"time": round(idx * interval, 3), "x": (idx % columns) * SPRITE_THUMB_WIDTH, "y": (idx // columns) * SPRITE_THUMB_HEIGHT}
+            for idx in range(count)
+        ],
+    }
+    with open(previews.sprite_index, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+
+
+def render_previews(clip_file, duration):
+    """Writes the proxy, sprite and sprite index of an existing clip in one decode of it."""
+    previews = preview_paths(clip_file)
+    graph, outputs = preview_graph(duration, previews, "[0:v]", audio_in="0:a:0?")
+    run_ffmpeg(["-i", clip_file, "-filter_complex", ";".join(graph), *outputs])
+    write_sprite_index(previews, duration)
+    return previews
+
+
+def reencode_clip(input_file, start, end, output_file, previews=False):
+    """Frame-accurate clip; seeking on the input means only the clip's own GOPs are decoded."""
+    if not previews:
+        run_ffmpeg(["-ss", str(start), "-i", input_file, "-t", str(end - start), *ENCODE_ARGS, "-y", output_file])
+        return
+
+    # The clip and its previews share one decode; -t on the input bounds every output
+    paths = preview_paths(output_file)
+    graph, outputs = preview_graph(end - start, paths, "[0:v]", video_out="[vmain]", audio_in="0:a:0?")
+    run_ffmpeg(["-ss", str(start), "-t", str(end - start), "-i", input_file, "-filter_complex", ";".join(graph),
+                "-map", "[vmain]", "-map", "0:a:0?", *ENCODE_ARGS, "-y", output_file, *outputs])
+    write_sprite_index(paths, end - start)
+
+
+def copy_clip(input_file, start, end, output_file):
+    """Stream copy snapped to the keyframe at or before start; fastest, for previews."""
+    run_ffmpeg(["-ss", str(start), "-i", input_file, "-t", str(end - start), "-c", "copy",
+                "-avoid_negative_ts", "make_zero", "-y", output_file])
+
+
+CLIP_MODES = {
+    "reencode": reencode_clip,
+    "copy": copy_clip,
+}
+
+if CLIP_MODE not in CLIP_MODES and CLIP_MODE != "single_pass":
+    print(f"Unknown CLIP_MODE {CLIP_MODE!r}, using reencode")
+    CLIP_MODE = "reencode"
+
+
+def extract_clip(input_file, start, end, output_file, mode=CLIP_MODE, previews=False):
+    if mode == "reencode":
+        return reencode_clip(input_file, start, end, output_file, previews)
+    CLIP_MODES[mode](input_file, start, end, output_file)
+    # Copy clips are never decoded, so their previews come from the finished clip
+    if previews:
+        render_previews(output_file, end - start)
+
+
+def single_pass_graph(timestamps, offset, audio, preview_files=None):
+    """Builds a split/trim filter graph cutting every interval out of one decode of the source.
+
+    With preview_files (Previews per interval) the graph also feeds each interval's proxy and sprite;
+    returns (graph, extra output args).
+    """
+    count = len(timestamps)
+    graph = [f"[0:v]split={count}" + "".join(f"[v{idx}]" for idx in range(count))]
+    if audio:
+        graph.append(f"[0:a]asplit={count}" + "".join(f"[a{idx}]" for idx in range(count)))
+    preview_outputs = []
+    for idx, (start, end) in enumerate(timestamps):
+        trimmed = f"[vtrim{idx}]" if preview_files else f"[vout{idx}]"
+        audio_trimmed = f"[atrim{idx}]" if preview_files else f"[aout{idx}]"
+        graph.append(f"[v{idx}]trim=start={start - offset}:end={end - offset},setpts=PTS-STARTPTS{trimmed}")
+        if audio:
+            graph.append(f"[a{idx}]atrim=start={start - offset}:end={end - offset},asetpts=PTS-STARTPTS{audio_trimmed}")
+        if preview_files:
+            lines, outputs = preview_graph(end - start, preview_files[idx], trimmed, video_out=f"[vout{idx}]",
+                                           audio_in=audio_trimmed if audio else None,
+                                           audio_out=f"[aout{idx}]" if audio else None, tag=idx)
+            graph += lines
+            preview_outputs += outputs
+    return ";\n".join(graph), preview_outputs
+
+
+def extract_single_pass(input_file, segments, output_folder, previews=False):
+    """Writes every (idx, start, end) segment to its own file from a single ffmpeg invocation, reading the source once.
+
+    Decoding starts at the first interval and stops at the last, so I/O is one read of that span
+    instead of one per interval. Per-segment times are not measurable and are reported as None.
+    """
+    timestamps = [(start, end) for _, start, end in segments]
+    offset = min(start for start, _ in timestamps)
+    span = max(end for _, end in timestamps) - offset
+    output_files = [os.path.join(output_folder, f"{uuid.uuid4()}.mp4") for _ in timestamps]
+    preview_files = [preview_paths(output_file) for output_file in output_files] if previews else None
+
+    script_fd, script_path = tempfile.mkstemp(suffix=".txt", dir=output_folder)
+    try:
+        audio = has_audio(input_file)
+        # A script file keeps the command line short however many intervals there are
+        graph, preview_outputs = single_pass_graph(timestamps, offset, audio, preview_files)
+        with os.fdopen(script_fd, "w", encoding="utf-8") as f:
+            f.write(graph)
+
+        outputs = []
+        for idx, output_file in enumerate(output_files):
+            outputs += ["-map", f"[vout{idx}]"]
+            if audio:
+                outputs += ["-map", f"[aout{idx}]"]
+            outputs += [*ENCODE_ARGS, "-max_muxing_queue_size", "4096", "-y", output_file]
+
+        with metrics.timer("highlighter_ffmpeg_seconds", operation="single_pass"):
+            run_ffmpeg(["-ss", str(offset), "-t", str(span), "-i", input_file,
+                        "-filter_complex_script", script_path, *outputs, *preview_outputs])
+        for (start, end), paths in zip(timestamps, preview_files or []):
+            write_sprite_index(paths, end - start)
+        error = None
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f"Error occurred while processing segments: {e}")
+        error = str(e)
+        # Whatever the failed run managed to write is unreferenced; the segments are retried or reported failed
+        for path in [*output_files, *(path for paths in preview_files or [] for path in paths)]:
+            if os.path.exists(path):
+                os.remove(path)
+    finally:
+        if os.path.exists(script_path):
+            os.remove(script_path)
+
+    results = []
+    for (idx, start, end), output_file in zip(segments, output_files):
+        if error is None and os.path.exists(output_file):
+            results.append(ClipResult(idx, start, end, output_file, None, None))
+        else:
+            results.append(ClipResult(idx, start, end, None, None, error or "Segment was not written"))
+    return results
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def clip_workers():
+    """Number of concurrent ffmpeg processes so that workers x encoder threads fits the available cores."""
+    if CLIP_WORKERS > 0:
+        return CLIP_WORKERS
+    return max(1, available_cores() // max(1, FFMPEG_THREADS))
+
+
+def extract_parallel(input_file, segments, output_folder, mode, workers, previews=False):
+    """Extracts (idx, start, end) segments with up to `workers` ffmpeg processes running at once."""
+
+    def process(idx, start, end):
+        output_file = os.path.join(output_folder, f"{uuid.uuid4()}.mp4")  # Generate unique filename
+        metrics.debug(f"Creating segment {idx+1}: {start}s to {end}s")
+        process_start_time = time.time()
+        try:
+            extract_clip(input_file, start, end, output_file, mode, previews)
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"Error occurred while processing segment {idx+1}: {e}")
+            return ClipResult(idx, start, end, None, time.time() - process_start_time, str(e))
+        process_time = time.time() - process_start_time
+        metrics.observe("highlighter_ffmpeg_seconds", process_time, operation=mode)
+        metrics.debug(f"Segment {idx+1} created: {output_file} (FFmpeg execution time: {process_time:.2f} seconds)")
+        return ClipResult(idx, start, end, output_file, process_time, None)
+
+    # ffmpeg does the work in child processes, so threads are enough to keep them all busy
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process, idx, start, end) for idx, start, end in segments]
+        return [future.result() for future in futures]
+
+
+def encoding_profile(mode):
+    """Cache identity of an encoding; the frame-accurate modes produce interchangeable clips."""
+    # "v2": clips cached while smart-cut mode existed may mix parameter sets and are not reused
+    return f"{'copy' if mode == 'copy' else 'accurate'}:v2:{' '.join(PROFILE_ARGS)}"
+
+
+def create_clips(input_file, plan, output_folder, mode=CLIP_MODE, workers=None, source_hash=None, cache=clip_cache.cache, previews=PREVIEWS_ENABLED):
+    """Cuts one clip per interval of a HighlightPlan.
+
+    With the source's content hash, clips already encoded for the same interval and profile come
+    from the clip cache and only new intervals are encoded. With previews, every clip also gets a
+    proxy and a thumbnail sprite. Returns a ClipBatch whose results follow the plan order; a failed
+    segment carries its error instead of stopping the batch.
+    """
+    start_time = time.time()
+    workers = workers or clip_workers()
+    print(f"Starting video processing ({mode} mode, {workers} workers)...")
+
+    os.makedirs(output_folder, exist_ok=True)
+
+    timestamps = plan.seconds()
+
+    metrics.debug(f"Parsed timestamps: {timestamps}")
+
+    use_cache = cache is not None and source_hash is not None
+    profile = encoding_profile(mode)
+    keys = [clip_key(source_hash, start_ms, end_ms, profile) for start_ms, end_ms in zip(plan.starts_ms.tolist(), plan.ends_ms.tolist())] if use_cache else []
+    companions = PREVIEW_SUFFIXES if previews else ()
+
+    results = [None] * len(timestamps)
+    pending = []
+    for idx, (start, end) in enumerate(timestamps):
+        if use_cache:
+            output_file = os.path.join(output_folder, f"{uuid.uuid4()}.mp4")
+            if cache.fetch(keys[idx], output_file, companions):
+                results[idx] = ClipResult(idx, start, end, output_file, 0.0, None)
+                continue
+        pending.append((idx, start, end))
+
+    if use_cache:
+        metrics.inc("highlighter_cache_hits_total", len(timestamps) - len(pending), cache="clip")
+        metrics.inc("highlighter_cache_misses_total", len(pending), cache="clip")
+        print(f"Clip cache: {len(timestamps) - len(pending)} cached, {len(pending)} to encode.")
+
+    if pending:
+        if mode == "single_pass":
+            extracted = extract_single_pass(input_file, pending, output_folder, previews)
+            # One bad interval fails the whole run; retry those segments one per ffmpeg process
+            failed = [(result.index, result.start, result.end) for result in extracted if result.error is not None]
+            if failed:
+                print(f"Retrying {len(failed)} segments one at a time...")
+                extracted = [result for result in extracted if result.error is None]
+                extracted += extract_parallel(input_file, failed, output_folder, "reencode", workers, previews)
+        else:
+            extracted = extract_parallel(input_file, pending, output_folder, mode, workers, previews)
+        for result in extracted:
+            results[result.index] = result
+
+    if previews:
+        # Cached clips from before previews were enabled, or whose previews failed, get them from the clip
+        def attach_previews(result):
+            paths = preview_paths(result.path)
+            if not all(os.path.exists(path) for path in paths):
+                try:
+                    with metrics.timer("highlighter_ffmpeg_seconds", operation="previews"):
+                        render_previews(result.path, result.end - result.start)
+                except (subprocess.CalledProcessError, OSError) as e:
+                    print(f"Error occurred while creating previews for segment {result.index+1}: {e}")
+                    return result
+            return result._replace(previews=paths)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(attach_previews, result) for result in results if result.error is None]
+            for future in futures:
+                result = future.result()
+                results[result.index] = result
+
+    if use_cache:
+        for idx, _, _ in pending:
+            result = results[idx]
+            if result.error is None:
+                cache.store(keys[idx], result.path, companions if result.previews else ())
+
+    total_time = time.time() - start_time
+    failed = sum(1 for result in results if result.error)
+    metrics.inc("highlighter_failures_total", failed, kind="segment")
+    print(f"Total processing time: {total_time:.2f} seconds ({len(results) - failed} created, {failed} failed)")
+
+    return ClipBatch(results, total_time)
@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -7,13 +8,43 @@ from dotenv import load_dotenv
 load_dotenv()
 
 url = os.getenv("DB_URL")
-engine = create_engine(url)
+# Sized for the request threadpool plus the job workers; pre-ping drops connections the server closed while idle
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+engine_options = {"pool_pre_ping": True}
+if not url.startswith("sqlite"):
+    engine_options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT, pool_recycle=DB_POOL_RECYCLE)
+engine = create_engine(url, **engine_options)
 SessionLocal = sessionmaker(autocommit = False, autoflush = False, bind = engine)
 Base = declarative_base()
 
+# Async drivers for the same databases; ASYNC_DB_URL overrides the URL derived from DB_URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def async_url(sync_url) :
+    backend, rest = sync_url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(backend.split('+')[0], backend)}://{rest}"
+
+async_engine = create_async_engine(os.getenv("ASYNC_DB_URL") or async_url(url), **engine_options)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush = False, expire_on_commit = False)
+
 def get_db() :
     db = SessionLocal()
     try :
         yield db
     finally :
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Rule: an async def handler takes get_async_db and awaits every database call. Anything blocking
+# (sync sessions, file I/O, ffmpeg, password hashing) lives in plain def handlers, which FastAPI
+# runs in its threadpool, or goes through run_in_threadpool, so the event loop never waits on it.
+async def get_async_db() :
+    async with AsyncSessionLocal() as db :
+        yield db
\ No newline at end of file
@@ -0,0 +1,81 @@
+import numpy as np
+from .subtitles import format_srt_time, parse_srt_time
+
+
+def as_intervals(starts, ends):
+    """Returns (starts, ends) as int64 millisecond arrays; accepts lists, array('q') or arrays."""
+    return np.asarray(starts, dtype=np.int64), np.asarray(ends, dtype=np.int64)
+
+
+def pad_intervals(starts, ends, before, after, duration_ms=None):
+    """Extends every interval by before/after ms (scalars or per-interval arrays), clamped to [0, duration]."""
+    starts, ends = as_intervals(starts, ends)
+    padded_starts = np.maximum(starts - np.asarray(before, dtype=np.int64), 0)
+    padded_ends = ends + np.asarray(after, dtype=np.int64)
+    if duration_ms is not None:
+        padded_ends = np.minimum(padded_ends, int(duration_ms))
+        padded_starts = np.minimum(padded_starts, padded_ends)
+    return padded_starts, padded_ends
+
+
+def nearest_boundaries(edges, boundaries, tolerance_ms):
+    """Moves each edge to the nearest boundary (sorted ms array) within tolerance_ms; other edges stay put."""
+    edges = np.asarray(edges, dtype=np.int64)
+    boundaries = np.asarray(boundaries, dtype=np.int64)
+    if edges.size == 0 or boundaries.size == 0:
+        return edges.copy()
+    right = np.clip(np.searchsorted(boundaries, edges), 0, boundaries.size - 1)
+    left = np.clip(right - 1, 0, boundaries.size - 1)
+    nearest = np.where(np.abs(boundaries[left] - edges) <= np.abs(boundaries[right] - edges), boundaries[left], boundaries[right])
+    return np.where(np.abs(nearest - edges) <= tolerance_ms, nearest, edges)
+
+
+def snap_intervals(starts, ends, boundaries, tolerance_ms):
+    """Snaps interval starts and ends to the nearest boundary within tolerance_ms, keeping every interval non-empty."""
+    starts, ends = as_intervals(starts, ends)
+    snapped_starts = nearest_boundaries(starts, boundaries, tolerance_ms)
+    snapped_ends = nearest_boundaries(ends, boundaries, tolerance_ms)
+    collapsed = snapped_starts >= snapped_ends
+    return np.where(collapsed, starts, snapped_starts), np.where(collapsed, ends, snapped_ends)
+
+
+def merge_groups(starts, ends, gap_ms=0):
+    """Sorts intervals and labels each with the merged group it belongs to.
+
+    Returns (order, groups, running_end): the sorting permutation, the group number of every
+    sorted interval and the running maximum end, from which merged bounds can be read off.
+    """
+    starts, ends = as_intervals(starts, ends)
+    order = np.lexsort((ends, starts))
+    starts, ends = starts[order], ends[order]
+
+    running_end = np.maximum.accumulate(ends) if ends.size else ends
+    # An interval opens a new group when it starts beyond the gap after everything before it
+    opens_group = np.empty(starts.size, dtype=bool)
+    opens_group[:1] = True
+    opens_group[1:] = starts[1:] > running_end[:-1] + gap_ms
+    return order, np.cumsum(opens_group) - 1, running_end
+
+
+def merge_intervals(starts, ends, gap_ms=0):
+    """Merges intervals that overlap or lie within gap_ms of the running end into continuous intervals."""
+    starts, ends = as_intervals(starts, ends)
+    if starts.size == 0:
+        return starts, ends
+
+    order, groups, running_end = merge_groups(starts, ends, gap_ms)
+    group_starts = np.flatnonzero(np.diff(groups, prepend=-1))
+    group_ends = np.append(group_starts[1:], starts.size) - 1
+    return starts[order][group_starts], running_end[group_ends]
+
+
+def from_srt_pairs(pairs):
+    """Converts [("HH:MM:SS,mmm", "HH:MM:SS,mmm"), ...] to millisecond arrays."""
+    starts = [parse_srt_time(start) for start, _ in pairs]
+    ends = [parse_srt_time(end) for _, end in pairs]
+    return as_intervals(starts, ends)
+
+
+def to_srt_pairs(starts, ends):
+    """Converts millisecond arrays back to [("HH:MM:SS,mmm", "HH:MM:SS,mmm"), ...]."""
+    return [(format_srt_time(start), format_srt_time(end)) for start, end in zip(starts.tolist(), ends.tolist())]
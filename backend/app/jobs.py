@@ -0,0 +1,330 @@
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from sqlalchemy import insert, or_, and_
+from . import models
+from . import metrics
+from .database import SessionLocal
+from .utils import STATIC_DIR, load_subtitles, analyze_excitement, create_clips, scoring_config_key
+from .storage import content_hash, load_cached_plan, save_cached_plan, acquire_file, release_file
+from .audio import AUDIO_ENABLED, load_crowd_energy
+from .shots import SHOTS_ENABLED, load_shot_boundaries
+from .clips import probe_duration_ms
+
+load_dotenv()
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+# A running job's worker renews its lease (updated_at) every third of this; a job whose lease expired
+# belongs to a worker that crashed or was terminated and is claimed again
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+# Write each job's HighlightPlan next to its clips for auditing
+HIGHLIGHT_PLAN_SIDECAR = os.getenv("HIGHLIGHT_PLAN_SIDECAR", "0") == "1"
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class JobError(Exception):
+    """A job failed for a reason worth showing to the user."""
+
+
+def segment_row(user_id, job_id, segment, video, preview=None):
+    """Column values of a Segments row; every row carries the same keys so a list of them inserts in one statement."""
+    preview = preview or {}
+    return {"user_id": user_id, "job_id": job_id, "segment": segment, "video": video,
+            "proxy": preview.get("proxy"), "sprite": preview.get("sprite"), "sprite_index": preview.get("sprite_index")}
+
+
+def enqueue_job(db, user_id, video, subtitle):
+    """Queues a segment job, or completes it at once when the same files were already processed with the same config.
+
+    The job takes its own reference on the stored video and subtitle; delete_job releases them.
+    Raises JobError when either name is not a stored upload.
+    """
+    for filename in (video, subtitle):
+        if not acquire_file(db, filename):
+            db.rollback()
+            raise JobError(f"Uploaded file {filename} not found.")
+
+    config_key = scoring_config_key()
+    previous = db.query(models.Jobs).filter(
+        models.Jobs.video == video,
+        models.Jobs.subtitle == subtitle,
+        models.Jobs.config_key == config_key,
+        models.Jobs.status == DONE,
+    ).order_by(models.Jobs.id.desc()).first()
+
+    job = models.Jobs(user_id=user_id, video=video, subtitle=subtitle, config_key=config_key, status=QUEUED)
+    db.add(job)
+    if previous is not None:
+        print(f"Reusing the result of job {previous.id}")
+        job.status = DONE
+        job.result = previous.result
+        db.flush()
+        # The clip files are shared; the new job gets its own segment and history rows
+        previous_result = json.loads(previous.result)
+        previews = previous_result.get("segment_previews") or [{}] * len(previous_result["segment_urls"])
+        if previous_result["segment_urls"]:
+            db.execute(insert(models.Segments), [
+                segment_row(user_id, job.id, segment, video, preview)
+                for segment, preview in zip(previous_result["segment_urls"], previews)
+            ])
+        db.add(models.EditHistory(inputVideo=video, subtitle=subtitle, user_id=user_id))
+
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def delete_job(db, job):
+    """Deletes a finished job and releases the references enqueue_job took on the stored video and subtitle."""
+    # Its segment rows stay with the user
+    db.query(models.Segments).filter(models.Segments.job_id == job.id).update({"job_id": None}, synchronize_session=False)
+    db.delete(job)
+    db.commit()
+    release_file(db, job.video)
+    release_file(db, job.subtitle)
+
+
+def claim_next_job(db):
+    """Atomically moves the oldest queued job, or running job with an expired lease, to running.
+
+    Returns None when there is nothing to claim or another worker won.
+    """
+    expired = datetime.utcnow() - timedelta(seconds=JOB_LEASE_SECONDS)
+    queued = models.Jobs.status == QUEUED
+    abandoned = and_(models.Jobs.status == RUNNING, models.Jobs.updated_at < expired)
+    job = db.query(models.Jobs).filter(or_(queued, abandoned)).order_by(models.Jobs.id).populate_existing().first()
+    if job is None:
+        return None
+    if job.status == RUNNING:
+        print(f"Reclaiming job {job.id}; its worker stopped renewing the lease")
+    # The same condition again in the UPDATE means only one worker wins
+    claimed = db.query(models.Jobs).filter(models.Jobs.id == job.id, queued if job.status == QUEUED else abandoned).update(
+        {"status": RUNNING, "updated_at": datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+    if claimed != 1:
+        return None
+    db.refresh(job)
+    return job
+
+
+def job_to_dict(job):
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "video_url": job.video,
+        "subtitle_url": job.subtitle,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "metrics": json.loads(job.metrics) if job.metrics else None,
+    }
+
+
+def process_segments(db, job):
+    """Analyses a job's subtitles, cuts the highlight clips and stores the segment rows."""
+    video_path = os.path.join(STATIC_DIR, job.video)
+    subtitle_path = os.path.join(STATIC_DIR, job.subtitle)
+
+    # Padded windows are clamped to the end of the video
+    duration_ms = probe_duration_ms(video_path)
+
+    # The plan depends on the subtitle content, the scoring config, the video duration and, with audio
+    # or shot analysis, the video content
+    subtitle_sha256 = content_hash(db, job.subtitle)
+    video_sha256 = content_hash(db, job.video)
+    uses_video = AUDIO_ENABLED or SHOTS_ENABLED
+    if uses_video:
+        # Without the video's hash its audio and cuts cannot be told apart from another video's: no caching
+        plan_key = f"{subtitle_sha256}_{video_sha256}" if subtitle_sha256 and video_sha256 else None
+    else:
+        plan_key = f"{subtitle_sha256}_{duration_ms or 'unknown'}ms" if subtitle_sha256 else None
+    plan = load_cached_plan(plan_key, job.config_key)
+    # Cue counts of the analysis; empty when the plan came from the cache
+    analysis_stats = {}
+    if plan is not None:
+        metrics.inc("highlighter_cache_hits_total", cache="plan")
+        print(f"Reusing cached highlight plan for {job.subtitle}")
+    else:
+        metrics.inc("highlighter_cache_misses_total", cache="plan")
+        # Process subtitles
+        subtitles = load_subtitles(subtitle_path)
+        if not subtitles:
+            raise JobError("No subtitles found in file.")
+
+        audio_energy = load_crowd_energy(video_path, video_sha256) if AUDIO_ENABLED else None
+        shot_boundaries = load_shot_boundaries(video_path, video_sha256) if SHOTS_ENABLED else None
+        plan = analyze_excitement(subtitles, stats=analysis_stats, duration_ms=duration_ms, audio_energy=audio_energy, shot_boundaries=shot_boundaries)
+        save_cached_plan(plan_key, job.config_key, plan)
+
+    if HIGHLIGHT_PLAN_SIDECAR:
+        plan.save_json(os.path.join(STATIC_DIR, f"{uuid.uuid4()}_highlight_plan.json"))
+
+    # Clips already encoded for this video content and interval are reused
+    clip_batch = create_clips(video_path, plan, STATIC_DIR, source_hash=video_sha256)
+    failed_segments = [
+        {"index": result.index, "start": result.start, "end": result.end, "error": result.error}
+        for result in clip_batch.results if result.error is not None
+    ]
+
+    # Save segment names in database
+    segment_urls = []
+    segment_previews = []
+    segment_rows = []
+    for result in clip_batch.results:
+        if result.error is not None:
+            continue
+        prefix = uuid.uuid4()
+        new_filename = f"{prefix}_{os.path.basename(result.path)}"
+
+        # Rename the file in the static directory
+        os.rename(result.path, os.path.join(STATIC_DIR, new_filename))
+
+        # Proxy, sprite and sprite index keep the clip's name as their prefix
+        preview = {}
+        if result.previews is not None:
+            for field, path in result.previews._asdict().items():
+                preview[field] = f"{prefix}_{os.path.basename(path)}"
+                os.rename(path, os.path.join(STATIC_DIR, preview[field]))
+
+        segment_rows.append(segment_row(job.user_id, job.id, new_filename, job.video, preview))
+        segment_urls.append(new_filename)
+        segment_previews.append(preview or None)
+
+    # Save the renamed files in the database with one multi-row insert
+    if segment_rows:
+        db.execute(insert(models.Segments), segment_rows)
+
+    # Store original files in EditHistory
+    db.add(models.EditHistory(inputVideo=job.video, subtitle=job.subtitle, user_id=job.user_id))
+    db.commit()
+
+    return {
+        "message": "Processing complete",
+        "segment_urls": segment_urls,
+        "segment_previews": segment_previews,
+        "video_url": job.video,
+        "subtitle_url": job.subtitle,
+        "total_segments": len(segment_urls),
+        "failed_segments": failed_segments,
+        "analysis": analysis_stats,
+        "segment_times": [result.time for result in clip_batch.results],
+        "total_time": clip_batch.total_time
+    }
+
+
+def run_job(db, job):
+    """Runs a claimed job and stores its result and the metrics recorded while it ran; returns those metrics."""
+    print(f"Running job {job.id}...")
+    with metrics.job_metrics() as recorded:
+        try:
+            result = process_segments(db, job)
+            job.result = json.dumps(result)
+            job.status = DONE
+        except Exception as e:
+            db.rollback()
+            print(f"Job {job.id} failed: {e}")
+            metrics.inc("highlighter_failures_total", kind="job")
+            job.error = str(e) if isinstance(e, JobError) else f"Unexpected error: {e}"
+            job.status = FAILED
+        metrics.inc("highlighter_jobs_total", status=job.status)
+    snapshot = recorded.snapshot()
+    job.metrics = json.dumps(snapshot)
+    db.commit()
+    return snapshot
+
+
+@contextmanager
+def lease_heartbeat(job_id, interval=JOB_LEASE_SECONDS / 3):
+    """Renews a running job's lease from a background thread while the body runs."""
+    done = threading.Event()
+
+    def renew():
+        while not done.wait(interval):
+            db = SessionLocal()
+            try:
+                db.query(models.Jobs).filter(models.Jobs.id == job_id, models.Jobs.status == RUNNING).update(
+                    {"updated_at": datetime.utcnow()}, synchronize_session=False)
+                db.commit()
+            except Exception as e:
+                print(f"Lease renewal for job {job_id} failed: {e}")
+            finally:
+                db.close()
+
+    thread = threading.Thread(target=renew, name=f"job-lease-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def worker_main(stop_event, metrics_queue=None):
+    """Worker process loop: warm the model once, then claim and run jobs until asked to stop.
+
+    Each job's metrics go to metrics_queue so the API process can expose them.
+    """
+    from .sentiment import registry
+    registry.load()
+
+    while not stop_event.is_set():
+        job = None
+        db = SessionLocal()
+        try:
+            job = claim_next_job(db)
+            if job is not None:
+                with lease_heartbeat(job.id):
+                    snapshot = run_job(db, job)
+                if metrics_queue is not None:
+                    metrics_queue.put(snapshot)
+        except Exception as e:
+            print(f"Job worker error: {e}")
+        finally:
+            db.close()
+        if job is None:
+            stop_event.wait(JOB_POLL_INTERVAL)
+
+
+class JobWorkerPool:
+    """Process-based workers that pull jobs from the jobs table; no broker needed."""
+
+    def __init__(self, workers=JOB_WORKERS):
+        self.workers = workers
+        # spawn, not fork: workers must not inherit the API process' DB connections or threads
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event = self._context.Event()
+        self._metrics_queue = self._context.Queue()
+        self._processes = []
+
+    def start(self):
+        for idx in range(self.workers):
+            process = self._context.Process(target=worker_main, args=(self._stop_event, self._metrics_queue), name=f"job-worker-{idx}", daemon=True)
+            process.start()
+            self._processes.append(process)
+        print(f"Started {self.workers} job workers.")
+
+    def stop(self, timeout=10):
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                # Its job stays running until the lease expires, then any worker claims it again
+                process.terminate()
+        self._processes = []
+        self.collect_metrics()
+
+    def collect_metrics(self):
+        """Merges the metrics of jobs the workers finished since the last call into this process' registry."""
+        while True:
+            try:
+                snapshot = self._metrics_queue.get_nowait()
+            except (queue.Empty, OSError, ValueError):
+                break
+            metrics.registry.merge(snapshot)
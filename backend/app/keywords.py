@@ -0,0 +1,114 @@
+import re
+from collections import namedtuple
+
+EXCITING_KEYWORDS = {
+        "goal", "scored", "winning", "champion", "shoot", "shot", "attack", "dribble", "tackle",  
+        "strike", "header", "corner", "free-kick", "penalty", "save", "offside", "counterattack",  
+        "equalizer", "hat-trick", "celebration", "cheer", "roar", "thrilling", "sensational",  
+        "brilliant", "amazing", "unbelievable", "stunning", "spectacular", "breathtaking",  
+        "incredible", "comeback", "last-minute", "injury-time", "extra-time", "pressure",  
+        "intense", "electric", "frenzy", "fast-paced", "end-to-end", "breakaway", "unstoppable",  
+        "masterclass", "legendary", "heroic", "explosive", "wild", "epic", "drama", "magnificent",  
+        "blockbuster", "thunderous", "volley", "half-volley", "bicycle-kick", "chip", "curling",  
+        "dazzling", "finesse", "powerful", "blistering", "world-class", "red-card", "yellow-card",  
+        "foul", "controversial", "VAR", "heart-stopping", "nail-biting", "edge-of-seat", "relentless",  
+        "dominance", "flawless", "decisive", "magic", "triumph", "rivalry", "undefeated",  
+        "gutsy", "miraculous", "roaring", "breakthrough", "highlight", "unstoppable", "unstoppable-run",  
+        "backheel", "nutmeg", "long-range", "wonder-goal", "screamer", "rocket", "unstoppable-shot",  
+        "top-corner", "worldie", "brilliant-save", "last-gasp", "title-decider", "underdog-victory",  
+        "record-breaking", "unstoppable-form", "unstoppable-strike", "moment-of-magic"
+    }
+
+HIGH_IMPACT_KEYWORDS = {
+    "goal", "scored", "penalty", "red card", "yellow card", "free kick", 
+    "corner", "VAR", "equalizer", "last-minute", "extra-time", "injury-time"
+}
+
+BORING_KEYWORDS = {
+        "goalless", "draw", "dull", "slow", "boring", "lackluster", "passive", "uneventful", "mundane",  
+        "predictable", "stagnant", "lifeless", "tedious", "pointless", "disappointing", "underwhelming",  
+        "missed", "off-target", "sideways", "backpass", "defensive", "cautious", "meaningless",  
+        "scoreless", "static", "half-hearted", "weak", "sloppy", "mistake", "error", "misplaced",  
+        "poor", "underperforming", "time-wasting", "delay", "long-ball", "scrappy", "stretched",  
+        "slow-tempo", "exhausted", "foul-filled", "stoppage", "injury-break", "out-of-form", "routine",  
+        "unambitious", "tired", "wasteful", "long-spell", "no-attacking-intent", "midfield-battle",  
+        "low-energy", "inconsistent", "pass-heavy", "aimless", "non-threatening", "predictable-passing",  
+        "offside-trap", "possession-based", "no-clear-chances", "low-intensity", "one-sided",  
+        "overhit", "underhit", "overcautious", "deep-block", "meaningless-possession", "cagey",  
+        "conservative", "out-of-ideas", "low-block", "park-the-bus", "counterproductive",  
+        "negative-play", "uninspired", "dry-spell", "few-opportunities", "no-shots-on-target",  
+        "defensive-minded", "wasted-opportunities", "shutout", "midfield-clog", "passive-pressing",  
+        "drained", "time-wasting-tactics", "holding-shape", "recycled-passing", "safe-play",  
+        "lacking-creativity", "few-highlights", "excessive-passing", "non-clinical", "careless",  
+        "missed-sitter", "out-of-sync", "poor-control", "miscommunication", "slow-buildup",  
+        "low-risk", "lack-of-movement", "rigid", "lacking-intensity", "possession-without-purpose"
+    }
+
+
+KeywordHits = namedtuple("KeywordHits", ["exciting", "high_impact", "boring"])
+
+_WORD_START = re.compile(r"(?<!\w)\w")
+
+
+def normalize_keyword(keyword):
+    return "-".join(keyword.lower().replace("-", " ").split())
+
+
+# Hyphens and spaces are interchangeable inside keywords ("free kick" == "free-kick")
+def _is_separator(char):
+    return char == "-" or char.isspace()
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+class KeywordIndex:
+    """Single-pass matcher reporting which keywords of each category occur as whole words in a text."""
+
+    def __init__(self, exciting, high_impact, boring):
+        self.categories = {}
+        for field, keywords in zip(KeywordHits._fields, (exciting, high_impact, boring)):
+            for keyword in keywords:
+                self.categories.setdefault(normalize_keyword(keyword), set()).add(field)
+
+        # Character trie; the "" entry of a node holds the keyword ending there
+        self.trie = {}
+        for keyword in self.categories:
+            node = self.trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = keyword
+
+    def _keywords_from(self, text, start):
+        """Every keyword that starts at text[start] and ends at a word boundary, shortest first."""
+        node = self.trie
+        i = start
+        while True:
+            if "" in node and (i == len(text) or not _is_word_char(text[i])):
+                yield node[""]
+            if i == len(text):
+                return
+            if _is_separator(text[i]) and "-" in node:
+                node = node["-"]
+                while i < len(text) and _is_separator(text[i]):
+                    i += 1
+            elif text[i] in node:
+                node = node[text[i]]
+                i += 1
+            else:
+                return
+
+    def match(self, text):
+        # Walking the trie from every word start costs O(keyword length) per word and keeps overlapping
+        # keywords: "offside trap" reports "offside" and "offside-trap", "wonder-goal" also reports "goal"
+        text = text.lower()
+        hits = {field: set() for field in KeywordHits._fields}
+        for found in _WORD_START.finditer(text):
+            for keyword in self._keywords_from(text, found.start()):
+                for field in self.categories[keyword]:
+                    hits[field].add(keyword)
+        return KeywordHits(*(frozenset(hits[field]) for field in KeywordHits._fields))
+
+
+KEYWORD_INDEX = KeywordIndex(EXCITING_KEYWORDS, HIGH_IMPACT_KEYWORDS, BORING_KEYWORDS)
@@ -2,19 +2,57 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from . import models
-from .database import engine
-from .routers import edit, user, auth, history, segment
+from .database import engine, async_engine, SessionLocal
+from .routers import edit, user, auth, history, segment, jobs, uploads, media
 from dotenv import load_dotenv
 load_dotenv()
 import os
-from fastapi.responses import FileResponse
+from fastapi import Request
+from fastapi.responses import PlainTextResponse
+from .media import media_response
+from .reels import segment_hash
+from contextlib import asynccontextmanager
+from .jobs import JobWorkerPool
+from .uploads import expire_uploads, UPLOAD_SWEEP_INTERVAL
+from .storage import sweep_stored_files
+import asyncio
+from . import metrics
 import mimetypes
 
 models.Base.metadata.create_all(bind=engine)
 
 mimetypes.add_type("video/mp4", ".mp4")
 
-app = FastAPI()
+def sweep():
+    expire_uploads()
+    db = SessionLocal()
+    try:
+        sweep_stored_files(db)
+    finally:
+        db.close()
+
+async def sweep_loop():
+    while True:
+        try:
+            await asyncio.to_thread(sweep)
+        except Exception as e:
+            print(f"Sweep failed: {e}")
+        await asyncio.sleep(UPLOAD_SWEEP_INTERVAL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Segment jobs run in worker processes, each loading the sentiment model once at start
+    worker_pool = JobWorkerPool()
+    worker_pool.start()
+    app.state.worker_pool = worker_pool
+    # Hourly cleanup of abandoned uploads and of stored files no job refers to
+    sweeper = asyncio.create_task(sweep_loop())
+    yield
+    sweeper.cancel()
+    worker_pool.stop()
+    await async_engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -37,16 +75,27 @@ app.add_middleware(
 )
 
 @app.get("/test-video")
-async def get_video():
+def get_video(request: Request):
     video_path = f"static/6c9e4f49-9db3-4bf7-ad79-674f1b3a8c0a.mp4"
     
     if not os.path.exists(video_path):
         return {"error": "File not found", "path_checked": video_path}
 
-    return FileResponse(video_path, media_type="video/mp4")
+    return media_response(request, video_path, segment_hash(video_path))
+
+# Prometheus scrape target; includes the stages that ran in the job workers
+@app.get("/metrics")
+def get_metrics(request: Request):
+    worker_pool = getattr(request.app.state, "worker_pool", None)
+    if worker_pool is not None:
+        worker_pool.collect_metrics()
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
 
 app.include_router(user.router)
 app.include_router(auth.router)
 app.include_router(edit.router)
 app.include_router(segment.router)
-app.include_router(history.router)
\ No newline at end of file
+app.include_router(history.router)
+app.include_router(jobs.router)
+app.include_router(uploads.router)
+app.include_router(media.router)
\ No newline at end of file
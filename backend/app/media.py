@@ -0,0 +1,121 @@
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+import anyio
+from dotenv import load_dotenv
+from starlette.responses import Response
+
+load_dotenv()
+
+MEDIA_CHUNK_SIZE = int(os.getenv("MEDIA_CHUNK_SIZE", str(1024 * 1024)))
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+_RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """Returns the inclusive (start, end) of a single byte range, or None to send the whole file.
+
+    Multi-range requests are answered with the whole file, which RFC 9110 allows.
+    """
+    if not header or "," in header:
+        return None
+    match = _RANGE_PATTERN.fullmatch(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+class MediaFileResponse(Response):
+    """Sends [start, end] of a file, zero-copy when the server offers the ASGI zerocopysend extension."""
+
+    def __init__(self, path, start, end, status_code, headers, media_type):
+        self.path = path
+        self.start = start
+        self.length = end - start + 1
+        super().__init__(status_code=status_code, headers={**headers, "content-length": str(self.length)}, media_type=media_type)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD" or self.length <= 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as f:
+                await send({"type": "http.response.zerocopysend", "file": f.fileno(), "offset": self.start, "count": self.length})
+            return
+
+        async with await anyio.open_file(self.path, "rb") as f:
+            await f.seek(self.start)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await f.read(min(MEDIA_CHUNK_SIZE, remaining))
+                remaining = remaining - len(chunk) if chunk else 0
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def media_response(request, path, sha256, immutable=False):
+    """Serves a media file with byte ranges and ETag / Last-Modified validation.
+
+    The ETag is the file's content hash; immutable marks files whose name is derived from their content.
+    """
+    stat = os.stat(path)
+    etag = f'"{sha256}"'
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(stat.st_mtime, usegmt=True),
+        "accept-ranges": "bytes",
+        "cache-control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+    }
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    if _not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    # A stale If-Range means the client's partial copy is of another version: send everything
+    if if_range is None or if_range.strip() in (etag, headers["last-modified"]):
+        try:
+            byte_range = parse_range(request.headers.get("range"), stat.st_size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{stat.st_size}"})
+
+    if byte_range is None:
+        return MediaFileResponse(path, 0, stat.st_size - 1, 200, headers, media_type)
+    start, end = byte_range
+    headers["content-range"] = f"bytes {start}-{end}/{stat.st_size}"
+    return MediaFileResponse(path, start, end, 206, headers, media_type)
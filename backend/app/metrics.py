@@ -0,0 +1,164 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "debug" also prints per-cue and per-segment detail
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info").lower()
+DEBUG = LOG_LEVEL == "debug"
+
+# Seconds; spans a keyword pass over a few cues up to encoding a long clip
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+METRIC_HELP = {
+    "highlighter_stage_seconds": "Time spent in each analysis stage (inference_batch is per model call).",
+    "highlighter_ffmpeg_seconds": "Time spent in each ffmpeg invocation, by operation.",
+    "highlighter_cues_total": "Subtitle cues analysed.",
+    "highlighter_model_inferences_total": "Cues scored by the sentiment model (score cache hits included).",
+    "highlighter_model_inferences_skipped_total": "Cues decided by keywords without a sentiment model call.",
+    "highlighter_cache_hits_total": "Cache hits, by cache.",
+    "highlighter_cache_misses_total": "Cache misses, by cache.",
+    "highlighter_failures_total": "Failures, by kind.",
+    "highlighter_jobs_total": "Finished segment jobs, by status.",
+}
+
+
+def debug(message):
+    if DEBUG:
+        print(message)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Registry:
+    """Counters and histograms keyed by name and labels, renderable in the Prometheus text format."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._histograms = {}  # (name, labels) -> [per-bucket counts, sum, count]
+        self._counters = {}  # (name, labels) -> value
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, **labels):
+        with self._lock:
+            entry = self._histograms.setdefault((name, _label_key(labels)), [[0] * len(self.buckets), 0.0, 0])
+            index = bisect.bisect_left(self.buckets, seconds)
+            if index < len(self.buckets):
+                entry[0][index] += 1
+            entry[1] += seconds
+            entry[2] += 1
+
+    def inc(self, name, amount=1, **labels):
+        if amount:
+            with self._lock:
+                key = (name, _label_key(labels))
+                self._counters[key] = self._counters.get(key, 0) + amount
+
+    def snapshot(self):
+        """JSON-friendly copy, e.g. to store with a job or send to another process."""
+        with self._lock:
+            return {
+                "histograms": [
+                    {"name": name, "labels": dict(labels), "buckets": list(counts), "sum": total, "count": count}
+                    for (name, labels), (counts, total, count) in self._histograms.items()
+                ],
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self._counters.items()
+                ],
+            }
+
+    def merge(self, snapshot):
+        with self._lock:
+            for histogram in snapshot.get("histograms", []):
+                key = (histogram["name"], _label_key(histogram["labels"]))
+                entry = self._histograms.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+                entry[0] = [a + b for a, b in zip(entry[0], histogram["buckets"])]
+                entry[1] += histogram["sum"]
+                entry[2] += histogram["count"]
+            for counter in snapshot.get("counters", []):
+                key = (counter["name"], _label_key(counter["labels"]))
+                self._counters[key] = self._counters.get(key, 0) + counter["value"]
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        seen = set()
+        for (name, labels), (counts, total, count) in histograms:
+            if name not in seen:
+                seen.add(name)
+                lines += [f"# HELP {name} {METRIC_HELP.get(name, name)}", f"# TYPE {name} histogram"]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', repr(bound))])} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines += [f"# HELP {name} {METRIC_HELP.get(name, name)}", f"# TYPE {name} counter"]
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide metrics, plus the registries of jobs currently recording in this process
+registry = Registry()
+_job_registries = []
+_job_registries_lock = threading.Lock()
+
+
+def _targets():
+    with _job_registries_lock:
+        return [registry, *_job_registries]
+
+
+def observe(name, seconds, **labels):
+    for target in _targets():
+        target.observe(name, seconds, **labels)
+
+
+def inc(name, amount=1, **labels):
+    for target in _targets():
+        target.inc(name, amount, **labels)
+
+
+@contextmanager
+def timer(name, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+@contextmanager
+def job_metrics():
+    """Additionally records everything measured in this process into a fresh Registry for one job."""
+    recorded = Registry()
+    with _job_registries_lock:
+        _job_registries.append(recorded)
+    try:
+        yield recorded
+    finally:
+        with _job_registries_lock:
+            _job_registries.remove(recorded)
@@ -1,6 +1,7 @@
 from .database import Base
-from sqlalchemy import Integer, String, Column, ForeignKey
+from sqlalchemy import Integer, BigInteger, String, Text, DateTime, Column, ForeignKey, Index
 from sqlalchemy.orm import relationship
+from datetime import datetime
 
 class User(Base) :
     __tablename__ = "users"
@@ -9,6 +10,7 @@ class User(Base) :
     email = Column(String(100), nullable=False)
     password = Column(String(100), nullable=False)
     role = Column(Integer, nullable=False)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     editHistory = relationship("EditHistory", back_populates="user")
     segments = relationship("Segments", back_populates="user")
     
@@ -21,11 +23,57 @@ class EditHistory(Base):
     time = Column(String(100), nullable=True, default=None)
     user_id = Column(Integer, ForeignKey("users.id"))
     user = relationship("User", back_populates="editHistory")
+    __table_args__ = (
+        Index("ix_edit_history_user_id_id", "user_id", "id"),
+    )
     
 class Segments(Base):
     __tablename__ = "segments"
     id = Column(Integer, primary_key=True, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"))
+    # Job that produced this row; the video name is shared by every upload of the same content
+    job_id = Column(Integer, ForeignKey("jobs.id", name="fk_segments_job_id_jobs"), nullable=True, default=None)
     segment = Column(String(255), nullable=False)
     video = Column(String(255), nullable=False)
-    user = relationship("User", back_populates="segments")
\ No newline at end of file
+    proxy = Column(String(255), nullable=True, default=None)
+    sprite = Column(String(255), nullable=True, default=None)
+    sprite_index = Column(String(255), nullable=True, default=None)
+    user = relationship("User", back_populates="segments")
+    __table_args__ = (
+        Index("ix_segments_user_id_video", "user_id", "video"),
+        Index("ix_segments_video", "video"),
+        Index("ix_segments_user_id_id", "user_id", "id"),
+        Index("ix_segments_job_id_id", "job_id", "id"),
+    )
+    
+class Jobs(Base):
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    video = Column(String(255), nullable=False)
+    subtitle = Column(String(255), nullable=False)
+    config_key = Column(String(64), nullable=True, default=None)
+    result = Column(Text, nullable=True, default=None)
+    error = Column(Text, nullable=True, default=None)
+    metrics = Column(Text, nullable=True, default=None)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+class StoredFiles(Base):
+    __tablename__ = "stored_files"
+    sha256 = Column(String(64), primary_key=True, nullable=False)
+    filename = Column(String(255), nullable=False, unique=True)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    # Kept without references until then, so a fresh upload survives until a job claims it
+    pinned_until = Column(DateTime, nullable=True)
+    
+class Reels(Base):
+    __tablename__ = "reels"
+    key = Column(String(64), primary_key=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    filename = Column(String(255), nullable=False)
+    segments = Column(Text, nullable=False)
+    time = Column(String(100), nullable=True, default=None)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
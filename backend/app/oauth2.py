@@ -1,19 +1,61 @@
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from . import schemas
-from .database import get_db
+from .database import get_async_db
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from . import models
-from .database import SessionLocal
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
 
 SECRET_KEY = "1234567890"
 ALGORITHM = "HS256"
 EXPIRATION_TIME = 60 * 60 * 24 * 7
 
+# How long a user's token version is trusted before it is re-read; revocations take effect within this time
+TOKEN_VERSION_TTL = float(os.getenv("TOKEN_VERSION_TTL", "60"))
+TOKEN_VERSION_CACHE_SIZE = 10000
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl = "login")
 
+class TokenVersionCache :
+    """User id -> current token version, read from the database at most once per TTL."""
+
+    def __init__(self, ttl = TOKEN_VERSION_TTL, max_entries = TOKEN_VERSION_CACHE_SIZE) :
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    async def get(self, db, user_id) :
+        now = time.monotonic()
+        with self._lock :
+            entry = self._entries.get(user_id)
+        if entry is not None and entry[1] > now :
+            return entry[0]
+        version = (await db.execute(select(models.User.token_version).where(models.User.id == user_id))).scalar()
+        with self._lock :
+            if len(self._entries) >= self.max_entries :
+                self._entries = { key : value for key, value in self._entries.items() if value[1] > now }
+            self._entries[user_id] = (version, now + self.ttl)
+        return version
+
+    def invalidate(self, user_id) :
+        with self._lock :
+            self._entries.pop(user_id, None)
+
+token_versions = TokenVersionCache()
+
+def token_claims(user) :
+    """Claims signed into a user's token; role and token version let requests be authorized without a DB read."""
+    return { "id" : user.id, "email" : user.email, "role" : user.role, "ver" : user.token_version or 0 }
+
 def create_access_token(data : dict) :
     to_encode = data.copy()
     expire_time = datetime.utcnow() + timedelta(minutes = EXPIRATION_TIME)
@@ -29,23 +71,31 @@ def verify_access_token(token : str, credentials_exception) :
     
         if not id :
             raise credentials_exception
-        token_data = schemas.TokenData(id = id, email = email)
+        token_data = schemas.TokenData(id = id, email = email, role = payload.get("role"), ver = payload.get("ver", 0))
     except JWTError :
         raise credentials_exception
     return token_data
     
-def get_current_user(token : str = Depends(oauth2_scheme), db : Session = Depends(get_db)) :
+async def get_current_user(token : str = Depends(oauth2_scheme), db : AsyncSession = Depends(get_async_db)) :
     credentials_exception = HTTPException(status_code = status.HTTP_401_UNAUTHORIZED, 
                                           detail = "error",
                                           headers = { "WWW-authenticate" : "Bearer"}
                                           )
     token_data = verify_access_token(token, credentials_exception)
+    # Tokens issued before the user's last revocation carry an older version
+    current_version = await token_versions.get(db, token_data.id)
+    if current_version is None or token_data.ver < current_version :
+        raise credentials_exception
     return token_data
 
+async def revoke_tokens(db, user_id) :
+    """Invalidates every token issued to a user so far, e.g. after a role change or a "sign out everywhere"."""
+    await db.execute(update(models.User).where(models.User.id == user_id).values(token_version = models.User.token_version + 1))
+    await db.commit()
+    token_versions.invalidate(user_id)
+
 def check_authorization(user) :
-    db = SessionLocal()
-    user_from_db = db.query(models.User).filter(models.User.id == user.id).first()
-    if user_from_db.role != 1 :
+    # The role comes from the signed token, so this needs no database access
+    if user.role != 1 :
         raise HTTPException(status_code = status.HTTP_401_UNAUTHORIZED, detail = "Unauthorized Access")
-    db.close()
-    return user_from_db
\ No newline at end of file
+    return user
\ No newline at end of file
@@ -0,0 +1,25 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "200"))
+
+
+async def keyset_page(db, statement, id_column, cursor=None, limit=PAGE_SIZE_DEFAULT):
+    """Returns one page of a column-projected select ordered by id, continuing after the cursor id.
+
+    Reads one row past the page to tell whether more follow, so no total count is needed.
+    """
+    limit = max(1, min(limit, PAGE_SIZE_MAX))
+    if cursor is not None:
+        statement = statement.where(id_column > cursor)
+    rows = (await db.execute(statement.order_by(id_column).limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    items = [row._asdict() for row in rows[:limit]]
+    return {
+        "items": items,
+        "next_cursor": items[-1]["id"] if has_more else None,
+        "has_more": has_more,
+    }
@@ -0,0 +1,91 @@
+import json
+from collections import namedtuple
+from dataclasses import dataclass, field
+import numpy as np
+from .intervals import as_intervals, merge_groups, to_srt_pairs
+
+HighlightInterval = namedtuple("HighlightInterval", ["start_ms", "end_ms", "score", "reasons"])
+
+
+@dataclass
+class HighlightPlan:
+    """Highlight intervals handed from analysis to clipping, with a score and the reasons behind each one."""
+
+    starts_ms: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    ends_ms: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    scores: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+    reasons: list = field(default_factory=list)  # tuple of reason strings per interval
+
+    @classmethod
+    def from_cues(cls, starts, ends, scores, reasons, gap_ms=0):
+        """Merges padded cue windows; each interval keeps its best cue score and the union of cue reasons."""
+        starts, ends = as_intervals(starts, ends)
+        if starts.size == 0:
+            return cls()
+
+        order, groups, running_end = merge_groups(starts, ends, gap_ms)
+        group_starts = np.flatnonzero(np.diff(groups, prepend=-1))
+        group_ends = np.append(group_starts[1:], starts.size) - 1
+
+        sorted_scores = np.asarray(scores, dtype=np.float64)[order]
+        merged_reasons = [set() for _ in group_starts]
+        for group, cue in zip(groups.tolist(), order.tolist()):
+            merged_reasons[group].update(reasons[cue])
+
+        return cls(
+            starts_ms=starts[order][group_starts],
+            ends_ms=running_end[group_ends],
+            scores=np.maximum.reduceat(sorted_scores, group_starts),
+            reasons=[tuple(sorted(group_reasons)) for group_reasons in merged_reasons],
+        )
+
+    def __len__(self):
+        return int(self.starts_ms.size)
+
+    def __iter__(self):
+        return map(HighlightInterval, self.starts_ms.tolist(), self.ends_ms.tolist(), self.scores.tolist(), self.reasons)
+
+    def seconds(self):
+        """Returns [(start, end), ...] in float seconds, as ffmpeg takes them."""
+        return [(start / 1000, end / 1000) for start, end in zip(self.starts_ms.tolist(), self.ends_ms.tolist())]
+
+    def to_srt_pairs(self):
+        return to_srt_pairs(self.starts_ms, self.ends_ms)
+
+    def to_dict(self):
+        return {"intervals": [interval._asdict() for interval in self]}
+
+    @classmethod
+    def from_dict(cls, data):
+        intervals = data.get("intervals", [])
+        return cls(
+            starts_ms=np.array([interval["start_ms"] for interval in intervals], dtype=np.int64),
+            ends_ms=np.array([interval["end_ms"] for interval in intervals], dtype=np.int64),
+            scores=np.array([interval["score"] for interval in intervals], dtype=np.float64),
+            reasons=[tuple(interval["reasons"]) for interval in intervals],
+        )
+
+    def save_json(self, path):
+        """Writes an audit sidecar; nothing on the request path reads it back."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load_json(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def save_npz(self, path):
+        """Compact binary sidecar of the same data."""
+        np.savez(path, starts_ms=self.starts_ms, ends_ms=self.ends_ms, scores=self.scores,
+                 reasons=np.array(["|".join(reasons) for reasons in self.reasons], dtype=str))
+
+    @classmethod
+    def load_npz(cls, path):
+        with np.load(path) as data:
+            return cls(
+                starts_ms=data["starts_ms"],
+                ends_ms=data["ends_ms"],
+                scores=data["scores"],
+                reasons=[tuple(filter(None, reasons.split("|"))) for reasons in data["reasons"].tolist()],
+            )
@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+import threading
+from sqlalchemy import delete
+from . import models
+from .utils import STATIC_DIR
+from .storage import COPY_BLOCK_SIZE
+
+# Segment files are written once and never modified, so (size, mtime) identifies their content
+_segment_hashes = {}
+_segment_hashes_lock = threading.Lock()
+
+
+def segment_hash(path):
+    """sha256 of a segment file, memoized per (path, size, mtime)."""
+    stat = os.stat(path)
+    memo_key = (path, stat.st_size, stat.st_mtime_ns)
+    with _segment_hashes_lock:
+        digest = _segment_hashes.get(memo_key)
+    if digest is None:
+        hasher = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(COPY_BLOCK_SIZE), b""):
+                hasher.update(block)
+        digest = hasher.hexdigest()
+        with _segment_hashes_lock:
+            _segment_hashes[memo_key] = digest
+    return digest
+
+
+def reel_key(segment_names):
+    """Identity of a reel: the ordered segment list and the content of each segment."""
+    hasher = hashlib.sha256()
+    for name in segment_names:
+        hasher.update(f"{name}:{segment_hash(os.path.join(STATIC_DIR, name))}\n".encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def find_reel(db, key):
+    """Returns the cached reel for key while its file is still on disk."""
+    reel = db.query(models.Reels).filter(models.Reels.key == key).first()
+    if reel is None:
+        return None
+    if not os.path.exists(os.path.join(STATIC_DIR, reel.filename)):
+        db.delete(reel)
+        db.commit()
+        return None
+    return reel
+
+
+def remember_reel(db, key, user_id, filename, segment_names, time):
+    db.merge(models.Reels(key=key, user_id=user_id, filename=filename, segments=json.dumps(segment_names), time=time))
+    db.commit()
+
+
+async def evict_reels(db, segment_name):
+    """Drops cache entries built from a segment (async session); the reel files stay, history still links to them."""
+    result = await db.execute(delete(models.Reels).where(models.Reels.segments.contains(json.dumps(segment_name))))
+    await db.commit()
+    return result.rowcount
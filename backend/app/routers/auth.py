@@ -21,7 +21,7 @@ def login_user(user_credentials: dict = Body(...), db: Session = Depends(get_db)
     if not utils.verify_password(password, user.password):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Incorrect password")
 
-    access_token = oauth2.create_access_token({"id": user.id, "email": user.email})
+    access_token = oauth2.create_access_token(oauth2.token_claims(user))
     return {
         "access_token": access_token,
         "token_type": "Bearer",
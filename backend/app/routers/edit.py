@@ -2,95 +2,88 @@ from fastapi import Depends, APIRouter, HTTPException, File, UploadFile
 from sqlalchemy.orm import Session
 from ..database import get_db
 from .. import models
-import shutil
 import os
-from ..utils import load_subtitles, analyze_excitement, save_timestamps, create_clips
+from ..utils import STATIC_DIR
 from ..oauth2 import get_current_user
+from ..jobs import enqueue_job, JobError
+from ..storage import save_stream, store_file
+from ..reels import reel_key, find_reel, remember_reel
+from ..clips import FFMPEG_PATH
+from .. import metrics
 import time
 import subprocess
 import uuid
-from ..schemas import TrimVideoRequest
+from ..schemas import TrimVideoRequest, CreateSegmentsRequest
 
 router = APIRouter()
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-STATIC_DIR = os.path.join(BASE_DIR, "..", "static")
+def record_reel_history(db, user_id, output_video, total_time):
+    """Adds an EditHistory row for a reel, linked to the user's most recent upload."""
+    last_edit_history = db.query(models.EditHistory).filter(models.EditHistory.user_id == user_id).order_by(models.EditHistory.id.desc()).first()
 
-@router.post("/create_segments/", status_code=201)
-async def create_segments(video: UploadFile = File(...), subtitle: UploadFile = File(...), db: Session = Depends(get_db), user = Depends(get_current_user)):
-    """API to receive video & subtitle file, process subtitles, create segments, and store segment names."""
+    input_video_filename = last_edit_history.inputVideo if last_edit_history else "unknown_video.mp4"
+    subtitle_filename = last_edit_history.subtitle if last_edit_history else "unknown_subtitle.srt"
 
-    if not subtitle.filename.endswith(".srt"):
-        raise HTTPException(status_code=400, detail="Only .srt subtitle files are supported.")
-
-    # Generate unique filenames
-    unique_video_filename = f"{uuid.uuid4()}_{video.filename}"
-    unique_subtitle_filename = f"{uuid.uuid4()}_{subtitle.filename}"
-
-    video_path = os.path.join(STATIC_DIR, unique_video_filename)
-    subtitle_path = os.path.join(STATIC_DIR, unique_subtitle_filename)
-
-    # Save uploaded files
-    with open(video_path, "wb") as f:
-        shutil.copyfileobj(video.file, f)
-    with open(subtitle_path, "wb") as f:
-        shutil.copyfileobj(subtitle.file, f)
-
-    # Process subtitles
-    subtitles = load_subtitles(subtitle_path)
-    if not subtitles:
-        raise HTTPException(status_code=400, detail="No subtitles found in file.")
-
-    timestamps = analyze_excitement(subtitles)
+    db.add(models.EditHistory(
+        inputVideo=input_video_filename,
+        outputVideo=output_video,
+        subtitle=subtitle_filename,
+        time=str(total_time),
+        user_id=user_id
+    ))
+    db.commit()
 
-    timestamps_file = os.path.join(STATIC_DIR, f"{uuid.uuid4()}_high_sentiment.txt")
-    save_timestamps(timestamps, timestamps_file)
+# Sync handler: FastAPI runs it in the threadpool, so the upload copy never blocks the event loop
+@router.post("/create_segments/", status_code=202)
+def create_segments(video: UploadFile = File(...), subtitle: UploadFile = File(...), db: Session = Depends(get_db), user = Depends(get_current_user)):
+    """API to receive video & subtitle file and queue a job that creates and stores the segments."""
 
-    # Start timing for segment creation
-    segment_creation_start_time = time.time()
+    if not subtitle.filename.endswith(".srt"):
+        raise HTTPException(status_code=400, detail="Only .srt subtitle files are supported.")
 
-    segment_paths = create_clips(video_path, timestamps_file, STATIC_DIR)
+    # Save uploaded files, hashed while streaming and stored once per distinct content
+    video_filename = store_file(db, *save_stream(video.file)[:2], video.filename)
+    subtitle_filename = store_file(db, *save_stream(subtitle.file)[:2], subtitle.filename)
 
-    # End timing
-    segment_creation_end_time = time.time()
-    total_segment_creation_time = segment_creation_end_time - segment_creation_start_time
+    try:
+        job = enqueue_job(db, user.id, video_filename, subtitle_filename)
+    except JobError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
-    # Save segment names in database
-    for segment in segment_paths:
-        new_filename = f"{uuid.uuid4()}_{os.path.basename(segment)}"
-        new_path = os.path.join(STATIC_DIR, new_filename)
-        
-        # Rename the file in the static directory
-        os.rename(segment, new_path)
+    return {
+        "message": "Processing queued" if job.status != "done" else "Processing complete",
+        "job_id": job.id,
+        "status": job.status,
+        "video_url": video_filename,
+        "subtitle_url": subtitle_filename,
+    }
 
-        # Save the renamed file in the database
-        new_segment = models.Segments(user_id=user.id, segment=new_filename, video=unique_video_filename)
-        db.add(new_segment)
 
-    # Store original files & processing time in EditHistory
-    new_history = models.EditHistory(
-        inputVideo=unique_video_filename,
-        subtitle=unique_subtitle_filename,
-        user_id=user.id
-    )
-    db.add(new_history)
+@router.post("/create_segments/uploaded/", status_code=202)
+def create_segments_from_uploads(request: CreateSegmentsRequest, db: Session = Depends(get_db), user = Depends(get_current_user)):
+    """API to queue a segment job for files already sent through the resumable /uploads endpoints."""
 
-    db.commit()
+    if not request.subtitle.endswith(".srt"):
+        raise HTTPException(status_code=400, detail="Only .srt subtitle files are supported.")
 
-    segment_urls = [f"{os.path.basename(segment)}" for segment in segment_paths]
+    # Only content stored through the uploads endpoints is accepted, never segments, reels or other static files
+    try:
+        job = enqueue_job(db, user.id, request.video, request.subtitle)
+    except JobError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
     return {
-        "message": "Processing complete",
-        "segment_urls": segment_urls,
-        "video_url": unique_video_filename,
-        "subtitle_url": unique_subtitle_filename,
-        "total_segments": len(segment_paths),
-        "total_time": total_segment_creation_time
+        "message": "Processing queued" if job.status != "done" else "Processing complete",
+        "job_id": job.id,
+        "status": job.status,
+        "video_url": request.video,
+        "subtitle_url": request.subtitle,
     }
 
 
+# Sync handler: hashing segments and running ffmpeg happen in the threadpool, off the event loop
 @router.post("/trim_video/", status_code=201)
-async def trim_video_api(request: TrimVideoRequest, db: Session = Depends(get_db), user = Depends(get_current_user)):
+def trim_video_api(request: TrimVideoRequest, db: Session = Depends(get_db), user = Depends(get_current_user)):
     """API to receive list of segment names, concatenate them, and return the final video."""
     
     segment_names = request.segment_names
@@ -100,16 +93,34 @@ async def trim_video_api(request: TrimVideoRequest, db: Session = Depends(get_db
 
     # Retrieve the segments from the static folder
     segment_files = []
-    print(segment_names)
+    metrics.debug(segment_names)
     for segment_name in segment_names:
         segment_path = os.path.join(STATIC_DIR, segment_name)
-        if not os.path.exists(segment_path):
+        if os.path.basename(segment_name) != segment_name or not os.path.exists(segment_path):
             raise HTTPException(status_code=404, detail=f"Segment {segment_name} not found in static folder.")
         segment_files.append(segment_path)
 
     # Start time for video concatenation
     video_concat_start_time = time.time()
 
+    # The same ordered segments were concatenated before: hand back that reel
+    key = reel_key(segment_names)
+    reel = find_reel(db, key)
+    if reel is not None:
+        metrics.inc("highlighter_cache_hits_total", cache="reel")
+        print(f"Reusing reel {reel.filename}")
+        total_time = time.time() - video_concat_start_time
+        # A repeated trim is still part of the user's history
+        record_reel_history(db, user.id, reel.filename, total_time)
+        return {
+            "message": "Video concatenation complete",
+            "final_video_url": reel.filename,
+            "total_time": total_time,
+            "cached": True
+        }
+
+    metrics.inc("highlighter_cache_misses_total", cache="reel")
+
     # Create a temporary text file with the list of segment files for FFmpeg
     concat_list_file = os.path.join(STATIC_DIR, f"concat_list_{uuid.uuid4()}.txt")
     
@@ -117,16 +128,15 @@ async def trim_video_api(request: TrimVideoRequest, db: Session = Depends(get_db
         with open(concat_list_file, "w", encoding="utf-8") as f:
             for segment_file in segment_files:
                 # Escape Windows paths or use forward slashes
-                f.write(f"file '{segment_file.replace('\\', '/')}'\n")
+                segment_file = segment_file.replace('\\', '/')
+                f.write(f"file '{segment_file}'\n")
 
         # Output path for the final concatenated video
         final_video_path = os.path.join(STATIC_DIR, f"final_output_{user.id}_{uuid.uuid4()}.mp4")
         
-        ffmpeg_path = r"C:\\ProgramData\\chocolatey\\bin\\ffmpeg.exe"
-
         # FFmpeg command to concatenate the video segments
         command = [
-            ffmpeg_path, 
+            FFMPEG_PATH, 
             "-f", "concat", 
             "-safe", "0", 
             "-i", concat_list_file, 
@@ -134,9 +144,11 @@ async def trim_video_api(request: TrimVideoRequest, db: Session = Depends(get_db
             "-y", final_video_path
         ]
 
-        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        with metrics.timer("highlighter_ffmpeg_seconds", operation="concat"):
+            result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
 
         if result.returncode != 0:
+            metrics.inc("highlighter_failures_total", kind="concat")
             raise HTTPException(status_code=500, detail=f"FFmpeg Error: {result.stderr}")
 
         # Clean up the temporary concat list file
@@ -149,30 +161,21 @@ async def trim_video_api(request: TrimVideoRequest, db: Session = Depends(get_db
         # Save the final video URL in the database
         final_video_url = os.path.basename(final_video_path)
 
-        # Fetch the last uploaded video and subtitle filenames for the user
-        last_edit_history = db.query(models.EditHistory).filter(models.EditHistory.user_id == user.id).order_by(models.EditHistory.id.desc()).first()
-
-        input_video_filename = last_edit_history.inputVideo if last_edit_history else "unknown_video.mp4"
-        subtitle_filename = last_edit_history.subtitle if last_edit_history else "unknown_subtitle.srt"
-
         # Save the final concatenated video information
-        new_history = models.EditHistory(
-            inputVideo=input_video_filename,
-            outputVideo=final_video_url,
-            subtitle=subtitle_filename,
-            time=str(total_video_concat_time),
-            user_id=user.id
-        )
-        db.add(new_history)
-        db.commit()
+        record_reel_history(db, user.id, final_video_url, total_video_concat_time)
+
+        remember_reel(db, key, user.id, final_video_url, segment_names, str(total_video_concat_time))
 
         # Return the URL of the final concatenated video
         return {
             "message": "Video concatenation complete",
             "final_video_url": final_video_url,
-            "total_time": total_video_concat_time
+            "total_time": total_video_concat_time,
+            "cached": False
         }
 
+    except HTTPException:
+        raise
     except subprocess.CalledProcessError as e:
         raise HTTPException(status_code=500, detail=f"Error occurred while concatenating videos: {e}")
     except Exception as ex:
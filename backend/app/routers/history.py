@@ -1,52 +1,60 @@
 from .. import models
-from fastapi import APIRouter, Depends, Form
-from sqlalchemy.orm import Session
-from ..database import get_db
+from fastapi import APIRouter, Depends, Form, Query
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db
 from fastapi.responses import JSONResponse
 from ..oauth2 import get_current_user, check_authorization
+from ..pagination import keyset_page, PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
 
 router = APIRouter()
 
+HISTORY_COLUMNS = (
+    models.EditHistory.id, models.EditHistory.inputVideo, models.EditHistory.outputVideo,
+    models.EditHistory.subtitle, models.EditHistory.time, models.EditHistory.user_id,
+)
+
 # save user's edit history to the database
 @router.post("/history", tags=['edit'], status_code=201)
-def save_history(inputVideo: str = Form(...), outputVideo: str = Form(...), subtitle: str = Form(...), time: str = Form(...), user_id: int = Form(...), db: Session = Depends(get_db)):
+async def save_history(inputVideo: str = Form(...), outputVideo: str = Form(...), subtitle: str = Form(...), time: str = Form(...), user_id: int = Form(...), db: AsyncSession = Depends(get_async_db)):
     new_history = models.EditHistory(inputVideo=inputVideo, outputVideo=outputVideo, subtitle=subtitle, time=time, user_id=user_id)
     db.add(new_history)
-    db.commit()
-    db.refresh(new_history)
+    await db.commit()
+    await db.refresh(new_history)
     return new_history
 
-# get user's edit history by user id from the database
+# get user's edit history by user id from the database, one keyset page at a time
 @router.get("/history/{user_id}", tags=['edit'], status_code=200)
-def get_history_by_user(user_id: int, db: Session = Depends(get_db)):
-    history = db.query(models.EditHistory).filter(models.EditHistory.user_id == user_id).all()
-    return history
+async def get_history_by_user(user_id: int, cursor: Optional[int] = None, limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX), db: AsyncSession = Depends(get_async_db)):
+    statement = select(*HISTORY_COLUMNS).where(models.EditHistory.user_id == user_id)
+    return await keyset_page(db, statement, models.EditHistory.id, cursor, limit)
 
 # get user's edit history by history id from the database
 @router.get("/history/{history_id}", tags=['edit'], status_code=200)
-def get_history_by_history(history_id: int, db: Session = Depends(get_db)):
-    history = db.query(models.EditHistory).filter(models.EditHistory.id == history_id).first()
+async def get_history_by_history(history_id: int, db: AsyncSession = Depends(get_async_db)):
+    history = (await db.execute(select(models.EditHistory).where(models.EditHistory.id == history_id))).scalars().first()
     return history
 
 # update user's edit history by history id from the database
 @router.put("/history/{history_id}", tags=['edit'], status_code=200)
-def update_history(history_id: int, inputVideo: str = Form(...), outputVideo: str = Form(...), subtitle: str = Form(...), time: str = Form(...), user_id: int = Form(...), db: Session = Depends(get_db), user = Depends(get_current_user)):
+async def update_history(history_id: int, inputVideo: str = Form(...), outputVideo: str = Form(...), subtitle: str = Form(...), time: str = Form(...), user_id: int = Form(...), db: AsyncSession = Depends(get_async_db), user = Depends(get_current_user)):
     check_authorization(user)
-    history = db.query(models.EditHistory).filter(models.EditHistory.id == history_id).first()
+    history = (await db.execute(select(models.EditHistory).where(models.EditHistory.id == history_id))).scalars().first()
     history.inputVideo = inputVideo
     history.outputVideo = outputVideo
     history.subtitle = subtitle
     history.time = time
     history.user_id = user_id
-    db.commit()
-    db.refresh(history)
+    await db.commit()
+    await db.refresh(history)
     return history
 
 # delete user's edit history by history id from the database
 @router.delete("/history/{history_id}", tags=['edit'], status_code=204)
-def delete_history(history_id: int, db: Session = Depends(get_db), user = Depends(get_current_user)):
+async def delete_history(history_id: int, db: AsyncSession = Depends(get_async_db), user = Depends(get_current_user)):
     check_authorization(user)
-    history = db.query(models.EditHistory).filter(models.EditHistory.id == history_id).first()
-    db.delete(history)
-    db.commit()
-    return JSONResponse(status_code=204, content="deleted")
\ No newline at end of file
+    history = (await db.execute(select(models.EditHistory).where(models.EditHistory.id == history_id))).scalars().first()
+    await db.delete(history)
+    await db.commit()
+    return JSONResponse(status_code=204, content="deleted")
@@ -0,0 +1,32 @@
+from .. import models
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..oauth2 import get_current_user
+from ..jobs import job_to_dict, delete_job, QUEUED, RUNNING
+
+router = APIRouter()
+
+# get the status (and the result once done) of a segment creation job
+@router.get("/jobs/{job_id}", tags=['edit'], status_code=200)
+def get_job(job_id: int, db: Session = Depends(get_db), user = Depends(get_current_user)):
+    job = db.query(models.Jobs).filter(models.Jobs.id == job_id, models.Jobs.user_id == user.id).first()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_dict(job)
+
+# list the user's jobs, newest first
+@router.get("/jobs", tags=['edit'], status_code=200)
+def get_jobs(db: Session = Depends(get_db), user = Depends(get_current_user)):
+    jobs = db.query(models.Jobs).filter(models.Jobs.user_id == user.id).order_by(models.Jobs.id.desc()).all()
+    return [job_to_dict(job) for job in jobs]
+
+# delete a finished job, releasing the stored files it referenced
+@router.delete("/jobs/{job_id}", tags=['edit'], status_code=204)
+def remove_job(job_id: int, db: Session = Depends(get_db), user = Depends(get_current_user)):
+    job = db.query(models.Jobs).filter(models.Jobs.id == job_id, models.Jobs.user_id == user.id).first()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status in (QUEUED, RUNNING):
+        raise HTTPException(status_code=409, detail="Job is still in progress")
+    delete_job(db, job)
@@ -0,0 +1,23 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..utils import STATIC_DIR
+from ..storage import content_hash
+from ..reels import segment_hash
+from ..media import media_response
+
+router = APIRouter()
+
+# stream a segment, reel or uploaded file with byte-range and cache validation support
+@router.api_route("/media/{filename}", methods=["GET", "HEAD"], tags=['media'])
+def get_media(filename: str, request: Request, db: Session = Depends(get_db)):
+    path = os.path.join(STATIC_DIR, filename)
+    if os.path.basename(filename) != filename or filename.startswith(".") or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    # Uploads are stored under their content hash; segments and reels are write-once, hashed on first request
+    sha256 = content_hash(db, filename)
+    if sha256 is not None:
+        return media_response(request, path, sha256, immutable=True)
+    return media_response(request, path, segment_hash(path))
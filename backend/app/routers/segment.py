@@ -1,55 +1,73 @@
 from .. import models
-from fastapi import APIRouter, Depends, Form
-from sqlalchemy.orm import Session
-from ..database import get_db
+from fastapi import APIRouter, Depends, Form, Query
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db
 from fastapi.responses import JSONResponse
 from ..oauth2 import get_current_user, check_authorization
+from ..reels import evict_reels
+from ..pagination import keyset_page, PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
 
 router = APIRouter()
 
+SEGMENT_COLUMNS = (
+    models.Segments.id, models.Segments.user_id, models.Segments.job_id, models.Segments.segment, models.Segments.video,
+    models.Segments.proxy, models.Segments.sprite, models.Segments.sprite_index,
+)
+
 # save user's segment to the database
 @router.post("/segments", tags=['edit'], status_code=201)
-def save_segment(segment: str = Form(...), user_id: int = Form(...), db: Session = Depends(get_db)):
+async def save_segment(segment: str = Form(...), user_id: int = Form(...), db: AsyncSession = Depends(get_async_db)):
     new_segment = models.Segments(user_id=user_id, segment=segment)
     db.add(new_segment)
-    db.commit()
-    db.refresh(new_segment)
+    await db.commit()
+    await db.refresh(new_segment)
     return new_segment
 
-# get user's segment by user id from the database
+# get user's segments by user id from the database, one keyset page at a time
 @router.get("/segments/user/{user_id}", tags=['edit'], status_code=200)
-def get_segment(user_id: int, db: Session = Depends(get_db)):
-    segment = db.query(models.Segments).filter(models.Segments.user_id == user_id).all()
-    return segment
+async def get_segment(user_id: int, cursor: Optional[int] = None, limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX), db: AsyncSession = Depends(get_async_db)):
+    statement = select(*SEGMENT_COLUMNS).where(models.Segments.user_id == user_id)
+    return await keyset_page(db, statement, models.Segments.id, cursor, limit)
 
 # get user's segment by segment id from the database
 @router.get("/segments/segment/{segment_id}", tags=['edit'], status_code=200)
-def get_segment(segment_id: int, db: Session = Depends(get_db)):
-    segment = db.query(models.Segments).filter(models.Segments.id == segment_id).first()
+async def get_segment(segment_id: int, db: AsyncSession = Depends(get_async_db)):
+    segment = (await db.execute(select(models.Segments).where(models.Segments.id == segment_id))).scalars().first()
     return segment
 
-# get user's segment by video name from the database
+# get the current user's segments of a video from the database, one keyset page at a time
+# (the video name is shared by every upload of the same content, so this spans all of the user's jobs for it)
 @router.get("/segments/video/{video_name}", tags=['edit'], status_code=200)
-def get_segment_by_video(video_name: str, db: Session = Depends(get_db)):
-    segment = db.query(models.Segments).filter(models.Segments.video == video_name).all()
-    return segment
+async def get_segment_by_video(video_name: str, cursor: Optional[int] = None, limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX), db: AsyncSession = Depends(get_async_db), user = Depends(get_current_user)):
+    statement = select(*SEGMENT_COLUMNS).where(models.Segments.user_id == user.id, models.Segments.video == video_name)
+    return await keyset_page(db, statement, models.Segments.id, cursor, limit)
+
+# get the segments one of the current user's jobs created, one keyset page at a time
+@router.get("/segments/job/{job_id}", tags=['edit'], status_code=200)
+async def get_segment_by_job(job_id: int, cursor: Optional[int] = None, limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX), db: AsyncSession = Depends(get_async_db), user = Depends(get_current_user)):
+    statement = select(*SEGMENT_COLUMNS).where(models.Segments.user_id == user.id, models.Segments.job_id == job_id)
+    return await keyset_page(db, statement, models.Segments.id, cursor, limit)
 
 # update user's segment by segment id from the database
 @router.put("/segments/{segment_id}", tags=['edit'], status_code=200)
-def update_segment(segment_id: int, segment: str = Form(...), user_id: int = Form(...), db: Session = Depends(get_db), user = Depends(get_current_user)):
+async def update_segment(segment_id: int, segment: str = Form(...), user_id: int = Form(...), db: AsyncSession = Depends(get_async_db), user = Depends(get_current_user)):
     check_authorization(user)
-    segment = db.query(models.Segments).filter(models.Segments.id == segment_id).first()
-    segment.segment = segment
-    segment.user_id = user_id
-    db.commit()
-    db.refresh(segment)
-    return segment
+    row = (await db.execute(select(models.Segments).where(models.Segments.id == segment_id))).scalars().first()
+    row.segment = segment
+    row.user_id = user_id
+    await db.commit()
+    await db.refresh(row)
+    return row
 
 # delete user's segment by segment id from the database
 @router.delete("/segments/{segment_id}", tags=['edit'], status_code=204)
-def delete_segment(segment_id: int, db: Session = Depends(get_db), user = Depends(get_current_user)):
+async def delete_segment(segment_id: int, db: AsyncSession = Depends(get_async_db), user = Depends(get_current_user)):
     check_authorization(user)
-    segment = db.query(models.Segments).filter(models.Segments.id == segment_id).first()
-    db.delete(segment)
-    db.commit()
-    return JSONResponse(status_code=204, content="deleted")
\ No newline at end of file
+    segment = (await db.execute(select(models.Segments).where(models.Segments.id == segment_id))).scalars().first()
+    await db.delete(segment)
+    await db.commit()
+    # Cached reels built from this segment must not be served again
+    await evict_reels(db, segment.segment)
+    return JSONResponse(status_code=204, content="deleted")
@@ -0,0 +1,83 @@
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from ..database import get_db
+from ..oauth2 import get_current_user
+from ..schemas import UploadInit
+from ..uploads import UploadSession, UploadError, UPLOAD_WRITE_SIZE
+
+router = APIRouter()
+
+# One chunk at a time per upload within this process; upload_id -> [lock, requests holding or waiting for it]
+_chunk_locks = {}
+
+@asynccontextmanager
+async def _upload_lock(upload_id):
+    """Serialises requests for one upload; the lock is dropped only once no request holds or waits for it."""
+    entry = _chunk_locks.setdefault(upload_id, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _chunk_locks[upload_id]
+
+async def _blocking(func, *args):
+    """Runs file I/O in the threadpool so the event loop stays free, mapping protocol errors to HTTP errors."""
+    try:
+        return await run_in_threadpool(func, *args)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+# start a resumable upload
+@router.post("/uploads", tags=['upload'], status_code=201)
+async def create_upload(upload: UploadInit, user = Depends(get_current_user)):
+    session = await _blocking(UploadSession.create, user.id, upload.filename, upload.total_size, upload.sha256)
+    return session.status()
+
+# current acknowledged offset, to resume after a dropped connection
+@router.get("/uploads/{upload_id}", tags=['upload'], status_code=200)
+async def get_upload(upload_id: str, user = Depends(get_current_user)):
+    session = await _blocking(UploadSession.load, upload_id, user.id)
+    return await _blocking(session.status)
+
+# append a chunk (raw request body) at the given offset
+@router.put("/uploads/{upload_id}", tags=['upload'], status_code=200)
+async def upload_chunk(upload_id: str, offset: int, request: Request, user = Depends(get_current_user)):
+    session = await _blocking(UploadSession.load, upload_id, user.id)
+    async with _upload_lock(upload_id):
+        writer, hasher = await _blocking(session.open_writer, offset)
+        buffer = bytearray()
+        try:
+            async for data in request.stream():
+                buffer += data
+                if len(buffer) >= UPLOAD_WRITE_SIZE:
+                    await _blocking(session.write_block, writer, hasher, bytes(buffer))
+                    buffer.clear()
+            if buffer:
+                await _blocking(session.write_block, writer, hasher, bytes(buffer))
+        except ClientDisconnect:
+            # Whatever reached the disk is acknowledged; the client resumes from GET /uploads/{id}
+            pass
+        finally:
+            new_offset = await run_in_threadpool(session.finish_chunk, writer, hasher)
+    return {"upload_id": upload_id, "offset": new_offset, "total_size": session.meta["total_size"]}
+
+# verify size/hash and store the file by content hash (an identical earlier upload is reused)
+@router.post("/uploads/{upload_id}/complete", tags=['upload'], status_code=200)
+async def complete_upload(upload_id: str, db: Session = Depends(get_db), user = Depends(get_current_user)):
+    session = await _blocking(UploadSession.load, upload_id, user.id)
+    async with _upload_lock(upload_id):
+        result = await _blocking(session.complete, db)
+    return result
+
+# abandon an upload
+@router.delete("/uploads/{upload_id}", tags=['upload'], status_code=204)
+async def delete_upload(upload_id: str, user = Depends(get_current_user)):
+    session = await _blocking(UploadSession.load, upload_id, user.id)
+    await _blocking(session.discard)
@@ -1,42 +1,49 @@
 from fastapi import Depends, APIRouter
 from fastapi.exceptions import HTTPException
-from ..database import get_db
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db
 from ..schemas import User, ResponseUser, Token
-from passlib.context import CryptContext
 from .. import models, oauth2
 from ..oauth2 import check_authorization
+from ..utils import hash_password
 
 router = APIRouter()
 
 @router.get("/")
-def home():
+async def home():
     return {"ping": "pong"}
 
 @router.post("/register", status_code = 201, response_model = Token, tags=['user'])
-def create_user(user : User ,db : Session = Depends(get_db)) :
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+async def create_user(user : User ,db : AsyncSession = Depends(get_async_db)) :
     # check for same email or username
-    if db.query(models.User).filter(models.User.email == user.email).first():
+    if (await db.execute(select(models.User.id).where(models.User.email == user.email))).first():
         raise HTTPException(status_code=400, detail="Email already registered")
-    if db.query(models.User).filter(models.User.username == user.username).first():
+    if (await db.execute(select(models.User.id).where(models.User.username == user.username))).first():
         raise HTTPException(status_code=400, detail="Username unavailable")
-    hashed_pass = pwd_context.hash(user.password)
+    # bcrypt is deliberately slow; hash off the event loop
+    hashed_pass = await run_in_threadpool(hash_password, user.password)
     user.password = hashed_pass
     new_user = models.User(**user.dict())
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    access_token = oauth2.create_access_token({ "id": new_user.id, "email": new_user.email })
+    await db.commit()
+    await db.refresh(new_user)
+    access_token = oauth2.create_access_token(oauth2.token_claims(new_user))
     return {"access_token": access_token, "token_type": "Bearer" }
 
 @router.get("/me", response_model=ResponseUser, tags=['user'])
-def get_info(db: Session = Depends(get_db), user = Depends(oauth2.get_current_user)):
-    user_from_db = db.query(models.User).filter(models.User.id == user.id).first()
+async def get_info(db: AsyncSession = Depends(get_async_db), user = Depends(oauth2.get_current_user)):
+    user_from_db = (await db.execute(select(models.User).where(models.User.id == user.id))).scalars().first()
     return user_from_db
 
 @router.get("/users", tags=['user'])
-def get_users(db: Session = Depends(get_db), user = Depends(oauth2.get_current_user)):
+async def get_users(db: AsyncSession = Depends(get_async_db), user = Depends(oauth2.get_current_user)):
     check_authorization(user)
-    users = db.query(models.User).all()
-    return users
\ No newline at end of file
+    users = (await db.execute(select(models.User))).scalars().all()
+    return users
+
+# invalidate every token issued to the current user ("sign out everywhere")
+@router.post("/me/revoke_tokens", status_code=204, tags=['user'])
+async def revoke_my_tokens(db: AsyncSession = Depends(get_async_db), user = Depends(oauth2.get_current_user)):
+    await oauth2.revoke_tokens(db, user.id)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import List
+from typing import List, Optional
 
 
 class User(BaseModel) :
@@ -17,10 +17,23 @@ class EditHistory(BaseModel) :
 class TrimVideoRequest(BaseModel):
     segment_names: List[str]
     
+class UploadInit(BaseModel):
+    filename: str
+    total_size: int
+    sha256: Optional[str] = None
+    
+class CreateSegmentsRequest(BaseModel):
+    video: str
+    subtitle: str
+    
 class Segments(BaseModel) :
     user_id : int
+    job_id : Optional[int] = None
     segment : str
     video : str
+    proxy : Optional[str] = None
+    sprite : Optional[str] = None
+    sprite_index : Optional[str] = None
      
 class ResponseUser(BaseModel) :
     id : int
@@ -42,6 +55,8 @@ class Token(BaseModel) :
 class TokenData(BaseModel) :
     id : int 
     email : str
+    role : Optional[int] = None
+    ver : int = 0
 
 class TokenResponse(BaseModel) :
     access_token : str
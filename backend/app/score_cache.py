@@ -0,0 +1,126 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.getenv("CACHE_DIR") or os.path.join(BASE_DIR, "..", "cache")
+SCORE_CACHE_PATH = os.getenv("SCORE_CACHE_PATH") or os.path.join(CACHE_DIR, "sentiment_scores.sqlite3")
+SCORE_CACHE_ENABLED = os.getenv("SCORE_CACHE_ENABLED", "1") == "1"
+SCORE_CACHE_MEMORY_SIZE = int(os.getenv("SCORE_CACHE_MEMORY_SIZE", "20000"))
+SCORE_CACHE_MAX_ENTRIES = int(os.getenv("SCORE_CACHE_MAX_ENTRIES", "500000"))
+
+
+def normalize_text(text):
+    """Lowercases and collapses whitespace so trivially different cues share an entry."""
+    return " ".join(text.lower().split())
+
+
+def cache_key(text, model_id, max_length):
+    """Content address of a sentiment score: hash of the normalized text, the model id and the truncation length."""
+    return hashlib.sha256(f"{model_id}\0{max_length}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class ScoreCache:
+    """Two-level (in-process LRU + SQLite) cache of (rating, confidence) sentiment scores."""
+
+    def __init__(self, path=SCORE_CACHE_PATH, memory_size=SCORE_CACHE_MEMORY_SIZE, max_entries=SCORE_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+
+    def _connection(self):
+        # A connection must not be shared with forked worker processes, so reopen after a fork
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS scores ("
+                "key TEXT PRIMARY KEY, rating INTEGER NOT NULL, confidence REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_scores_last_used ON scores (last_used)")
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _remember(self, key, score):
+        self._memory[key] = score
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """Returns {key: (rating, confidence)} for every key found in memory or on disk."""
+        found = {}
+        with self._lock:
+            pending = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                    self.memory_hits += 1
+                else:
+                    pending.append(key)
+
+            if pending:
+                conn = self._connection()
+                now = time.time()
+                # Stay under SQLite's bound-parameter limit
+                for i in range(0, len(pending), 500):
+                    chunk = pending[i:i + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = conn.execute(f"SELECT key, rating, confidence FROM scores WHERE key IN ({placeholders})", chunk).fetchall()
+                    for key, rating, confidence in rows:
+                        found[key] = (rating, confidence)
+                        self._remember(key, (rating, confidence))
+                    conn.execute(f"UPDATE scores SET last_used = ? WHERE key IN ({placeholders})", [now, *chunk])
+                conn.commit()
+                hits = sum(1 for key in pending if key in found)
+                self.disk_hits += hits
+                self.misses += len(pending) - hits
+        return found
+
+    def put_many(self, scores):
+        """Stores {key: (rating, confidence)} and evicts the least recently used rows past max_entries."""
+        if not scores:
+            return
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            conn.executemany(
+                "INSERT OR REPLACE INTO scores (key, rating, confidence, last_used) VALUES (?, ?, ?, ?)",
+                [(key, rating, confidence, now) for key, (rating, confidence) in scores.items()],
+            )
+            for key, score in scores.items():
+                self._remember(key, score)
+
+            total = conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+            if total > self.max_entries:
+                conn.execute(
+                    "DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY last_used LIMIT ?)",
+                    (total - self.max_entries,),
+                )
+            conn.commit()
+
+    def stats(self):
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self._memory),
+        }
+
+
+cache = ScoreCache() if SCORE_CACHE_ENABLED else None
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from . import score_cache
+from . import metrics
+
+load_dotenv()
+
+SENTIMENT_MODEL = os.getenv("SENTIMENT_MODEL") or "nlptown/bert-base-multilingual-uncased-sentiment"
+# Directory holding a saved copy of the model (save_pretrained output). When set, the Hub is never contacted for it.
+SENTIMENT_MODEL_DIR = os.getenv("SENTIMENT_MODEL_DIR") or None
+SENTIMENT_OFFLINE = os.getenv("SENTIMENT_OFFLINE", "0") == "1"
+SENTIMENT_WARMUP_TEXT = "what a goal"
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "32"))
+SENTIMENT_MAX_LENGTH = int(os.getenv("SENTIMENT_MAX_LENGTH", "128"))
+
+
+class ModelRegistry:
+    """Holds one resident sentiment pipeline per process, shared by every request."""
+
+    def __init__(self, model=SENTIMENT_MODEL, model_dir=SENTIMENT_MODEL_DIR, offline=SENTIMENT_OFFLINE):
+        self.model = model
+        self.model_dir = model_dir
+        self.offline = offline
+        self.load_time = None
+        self._pipeline = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_id(self):
+        """Identifier of the loaded weights, used to key anything derived from model output."""
+        return self.model_dir or self.model
+
+    @property
+    def loaded(self):
+        return self._pipeline is not None
+
+    def load(self):
+        """Loads and warms up the pipeline once; later calls return the same instance."""
+        if self._pipeline is not None:
+            return self._pipeline
+
+        with self._lock:
+            if self._pipeline is not None:
+                return self._pipeline
+
+            if self.offline or self.model_dir:
+                # Must be set before transformers/huggingface_hub are imported to take effect.
+                os.environ["HF_HUB_OFFLINE"] = "1"
+                os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
+            from transformers import pipeline
+
+            print(f"Initializing sentiment analysis model ({self.model_id})...")
+            model_load_time = time.time()
+            sentiment_pipeline = pipeline("sentiment-analysis", model=self.model_id)
+            sentiment_pipeline(SENTIMENT_WARMUP_TEXT)
+            self.load_time = time.time() - model_load_time
+            print(f"Model loaded and warmed up. (Time: {self.load_time:.2f} sec)")
+
+            self._pipeline = sentiment_pipeline
+            return self._pipeline
+
+    def get(self):
+        """Returns the resident pipeline, loading it on first use if startup did not."""
+        return self._pipeline if self._pipeline is not None else self.load()
+
+
+registry = ModelRegistry()
+
+
+def get_sentiment_pipeline():
+    return registry.get()
+
+
+def length_buckets(texts, batch_size):
+    """Groups text indices into batches of similar length so each batch pads as little as possible."""
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def run_model(texts, sentiment_pipeline, batch_size=SENTIMENT_BATCH_SIZE, max_length=SENTIMENT_MAX_LENGTH):
+    """Scores texts in length-bucketed batches and returns (rating, confidence) pairs in the original order."""
+    scores = [None] * len(texts)
+    for bucket in length_buckets(texts, max(1, batch_size)):
+        with metrics.timer("highlighter_stage_seconds", stage="inference_batch"):
+            results = sentiment_pipeline(
+                [texts[i] for i in bucket],
+                batch_size=len(bucket),
+                truncation=True,
+                max_length=max_length,
+            )
+        for i, result in zip(bucket, results):
+            scores[i] = (int(result["label"][0]), result["score"])  # Numeric rating (1-5 scale) and confidence
+    return scores
+
+
+def pipeline_model_id(sentiment_pipeline):
+    """Model identifier of a caller-supplied pipeline, or None when it does not expose one."""
+    if sentiment_pipeline is None:
+        return registry.model_id
+    return getattr(getattr(sentiment_pipeline, "model", None), "name_or_path", None) or None
+
+
+def score_texts(texts, sentiment_pipeline=None, batch_size=SENTIMENT_BATCH_SIZE, max_length=SENTIMENT_MAX_LENGTH, cache=score_cache.cache):
+    """Scores texts, sending only those missing from the score cache (deduplicated) through the model.
+
+    Scores are cached per model and truncation length; a passed-in pipeline whose model cannot be
+    identified bypasses the cache.
+    """
+    model_id = pipeline_model_id(sentiment_pipeline)
+    if cache is None or model_id is None:
+        return run_model(texts, sentiment_pipeline or get_sentiment_pipeline(), batch_size, max_length)
+
+    keys = [score_cache.cache_key(text, model_id, max_length) for text in texts]
+    scores = cache.get_many(set(keys))
+    cached_count = sum(1 for key in keys if key in scores)
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in scores:
+            missing.setdefault(key, text)
+
+    if missing:
+        results = run_model(list(missing.values()), sentiment_pipeline or get_sentiment_pipeline(), batch_size, max_length)
+        computed = dict(zip(missing.keys(), results))
+        cache.put_many(computed)
+        scores.update(computed)
+
+    metrics.inc("highlighter_cache_hits_total", cached_count, cache="score")
+    metrics.inc("highlighter_cache_misses_total", len(texts) - cached_count, cache="score")
+    print(f"Sentiment cache: {cached_count}/{len(texts)} cues cached, {len(missing)} unique texts sent to the model.")
+    return [scores[key] for key in keys]
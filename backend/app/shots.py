@@ -0,0 +1,102 @@
+import os
+import subprocess
+import time
+import uuid
+import numpy as np
+from dotenv import load_dotenv
+from .clips import FFMPEG_PATH
+from . import metrics
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.getenv("CACHE_DIR") or os.path.join(BASE_DIR, "..", "cache")
+SHOT_CACHE_DIR = os.getenv("SHOT_CACHE_DIR") or os.path.join(CACHE_DIR, "shots")
+SHOTS_ENABLED = os.getenv("SHOTS_ENABLED", "1") == "1"
+# Frames are sampled at SHOT_FPS and shrunk to a thumbnail; cuts survive that, and decoding stays cheap
+SHOT_FPS = int(os.getenv("SHOT_FPS", "4"))
+SHOT_WIDTH, SHOT_HEIGHT = 64, 36
+SHOT_HISTOGRAM_BINS = 32
+# Half the L1 distance of consecutive normalized histograms, in [0, 1]
+SHOT_THRESHOLD = float(os.getenv("SHOT_THRESHOLD", "0.35"))
+SHOT_MIN_LENGTH_MS = 500
+SHOT_SNAP_TOLERANCE_MS = int(os.getenv("SHOT_SNAP_TOLERANCE_MS", "1500"))
+SHOT_BLOCK_FRAMES = 256
+
+
+def stream_frames(input_file, block_frames=SHOT_BLOCK_FRAMES):
+    """Yields uint8 blocks of shape (frames, pixels) of downscaled grayscale frames decoded by ffmpeg over a pipe."""
+    frame_size = SHOT_WIDTH * SHOT_HEIGHT
+    command = [FFMPEG_PATH, "-hide_banner", "-loglevel", "error", "-i", input_file, "-an",
+               "-vf", f"fps={SHOT_FPS},scale={SHOT_WIDTH}:{SHOT_HEIGHT}", "-pix_fmt", "gray", "-f", "rawvideo", "-"]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    try:
+        while True:
+            data = process.stdout.read(block_frames * frame_size)
+            frames = len(data) // frame_size
+            if frames == 0:
+                break
+            yield np.frombuffer(data[:frames * frame_size], dtype=np.uint8).reshape(frames, frame_size)
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command)
+
+
+def histograms(frames):
+    """Normalized gray-level histograms of a block of frames, one row per frame, in a single bincount."""
+    count, pixels = frames.shape
+    bins = frames.astype(np.int64) // (256 // SHOT_HISTOGRAM_BINS)
+    bins += np.arange(count, dtype=np.int64)[:, None] * SHOT_HISTOGRAM_BINS
+    return np.bincount(bins.ravel(), minlength=count * SHOT_HISTOGRAM_BINS).reshape(count, SHOT_HISTOGRAM_BINS) / pixels
+
+
+def detect_shots(input_file):
+    """Shot boundaries (ms, sorted int64) where consecutive frame histograms differ by more than SHOT_THRESHOLD."""
+    boundaries = []
+    previous = None
+    frame_offset = 0
+    for frames in stream_frames(input_file):
+        hist = histograms(frames)
+        # The first frame of a block is compared with the last frame of the previous one
+        earlier = np.vstack([hist[:1] if previous is None else previous[None], hist[:-1]])
+        distance = 0.5 * np.abs(hist - earlier).sum(axis=1)
+        cuts = np.flatnonzero(distance > SHOT_THRESHOLD) + frame_offset
+        boundaries.extend((cuts * 1000 // SHOT_FPS).tolist())
+        previous = hist[-1]
+        frame_offset += len(frames)
+
+    # Flashes and fast pans trigger bursts of cuts; keep the first of each burst
+    kept = []
+    for boundary in boundaries:
+        if not kept or boundary - kept[-1] >= SHOT_MIN_LENGTH_MS:
+            kept.append(boundary)
+    return np.asarray(kept, dtype=np.int64)
+
+
+def _index_path(source_hash):
+    return os.path.join(SHOT_CACHE_DIR, f"{source_hash}_{SHOT_FPS}_{SHOT_THRESHOLD}.npy")
+
+
+def load_shot_boundaries(input_file, source_hash=None):
+    """Returns the video's shot index, detecting and caching it per content hash on first use; None without video."""
+    start_time = time.time()
+    path = _index_path(source_hash) if source_hash is not None else None
+    try:
+        if path is not None and os.path.exists(path):
+            return np.load(path, mmap_mode="r")
+        with metrics.timer("highlighter_stage_seconds", stage="shots"):
+            boundaries = detect_shots(input_file)
+    except (subprocess.CalledProcessError, OSError, ValueError) as e:
+        print(f"Shot detection unavailable: {e}")
+        return None
+
+    if path is not None:
+        os.makedirs(SHOT_CACHE_DIR, exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            np.save(f, boundaries)
+        os.replace(temp_path, path)
+    print(f"Shot detection completed: {len(boundaries)} cuts. (Time: {time.time() - start_time:.2f} sec)")
+    return boundaries
@@ -0,0 +1,150 @@
+import errno
+import hashlib
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from . import models
+from .plan import HighlightPlan
+from .utils import STATIC_DIR, CACHE_DIR
+
+PLAN_CACHE_DIR = os.path.join(CACHE_DIR, "plans")
+COPY_BLOCK_SIZE = 1024 * 1024
+
+load_dotenv()
+
+# How long a stored file is kept while no job refers to it yet
+STORED_FILE_PIN_SECONDS = int(os.getenv("STORED_FILE_PIN_SECONDS", str(24 * 3600)))
+
+
+def save_stream(fileobj, directory=STATIC_DIR):
+    """Copies a stream to a temporary file in fixed-size blocks, hashing as it goes. Returns (path, sha256, size)."""
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".incoming_{uuid.uuid4().hex}")
+    hasher = hashlib.sha256()
+    size = 0
+    with open(temp_path, "wb") as f:
+        for block in iter(lambda: fileobj.read(COPY_BLOCK_SIZE), b""):
+            hasher.update(block)
+            f.write(block)
+            size += len(block)
+    return temp_path, hasher.hexdigest(), size
+
+
+def _move_into_place(src, dest):
+    """Moves src to dest atomically, also when src is on another filesystem (e.g. a separate UPLOAD_DIR)."""
+    try:
+        os.replace(src, dest)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        # Copy next to the destination first so dest never holds a partial file
+        tmp_path = f"{dest}.{uuid.uuid4().hex}.tmp"
+        try:
+            shutil.move(src, tmp_path)
+            os.replace(tmp_path, dest)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def store_file(db, temp_path, sha256, original_name):
+    """Keeps one copy of each distinct content, named by its hash.
+
+    The temporary file is moved into place for new content and removed for content already stored.
+    References are taken by the jobs that use the file (acquire_file); until then the file is pinned
+    for STORED_FILE_PIN_SECONDS. Returns the stored filename (relative to the static folder).
+    """
+    extension = os.path.splitext(original_name or "")[1].lower()
+    pinned_until = datetime.utcnow() + timedelta(seconds=STORED_FILE_PIN_SECONDS)
+    stored = db.query(models.StoredFiles).filter(models.StoredFiles.sha256 == sha256).with_for_update().first()
+    if stored is None:
+        stored = models.StoredFiles(sha256=sha256, filename=f"{sha256}{extension}", size=os.path.getsize(temp_path),
+                                    ref_count=0, pinned_until=pinned_until)
+        _move_into_place(temp_path, os.path.join(STATIC_DIR, stored.filename))
+        db.add(stored)
+        try:
+            db.flush()
+        except IntegrityError:
+            # Another request stored the same content at the same moment; both copies are identical
+            db.rollback()
+            return store_file(db, temp_path, sha256, original_name)
+    else:
+        stored.pinned_until = max(stored.pinned_until or pinned_until, pinned_until)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    db.commit()
+    print(f"Stored {stored.filename} (references: {stored.ref_count})")
+    return stored.filename
+
+
+def acquire_file(db, filename):
+    """Takes one reference on a stored file, committed by the caller; False when no stored file has that name."""
+    stored = db.query(models.StoredFiles).filter(models.StoredFiles.filename == filename).with_for_update().first()
+    if stored is None or not os.path.exists(os.path.join(STATIC_DIR, stored.filename)):
+        return False
+    stored.ref_count += 1
+    return True
+
+
+def _delete_stored(db, stored):
+    path = os.path.join(STATIC_DIR, stored.filename)
+    if os.path.exists(path):
+        os.remove(path)
+    db.delete(stored)
+
+
+def release_file(db, filename):
+    """Drops one reference; the file is deleted when nothing refers to it anymore and its pin has expired."""
+    stored = db.query(models.StoredFiles).filter(models.StoredFiles.filename == filename).with_for_update().first()
+    if stored is None:
+        return
+    stored.ref_count -= 1
+    if stored.ref_count <= 0 and (stored.pinned_until is None or stored.pinned_until <= datetime.utcnow()):
+        _delete_stored(db, stored)
+    db.commit()
+
+
+def sweep_stored_files(db):
+    """Deletes stored files that no job refers to and whose pin has expired, e.g. uploads never used."""
+    unreferenced = db.query(models.StoredFiles).filter(
+        models.StoredFiles.ref_count <= 0,
+        or_(models.StoredFiles.pinned_until.is_(None), models.StoredFiles.pinned_until <= datetime.utcnow()),
+    ).with_for_update().all()
+    for stored in unreferenced:
+        _delete_stored(db, stored)
+    db.commit()
+    if unreferenced:
+        print(f"Removed {len(unreferenced)} unreferenced stored file(s)")
+    return len(unreferenced)
+
+
+def content_hash(db, filename):
+    stored = db.query(models.StoredFiles).filter(models.StoredFiles.filename == filename).first()
+    return stored.sha256 if stored else None
+
+
+def _plan_path(content_key, config_key):
+    return os.path.join(PLAN_CACHE_DIR, f"{content_key}_{config_key}.json")
+
+
+def load_cached_plan(content_key, config_key):
+    """Returns the HighlightPlan computed earlier for this content (subtitle hash plus video duration, or video hash with audio or shots) and scoring config, if any."""
+    path = _plan_path(content_key, config_key)
+    if content_key is None or not os.path.exists(path):
+        return None
+    return HighlightPlan.load_json(path)
+
+
+def save_cached_plan(content_key, config_key, plan):
+    if content_key is None:
+        return
+    os.makedirs(PLAN_CACHE_DIR, exist_ok=True)
+    path = _plan_path(content_key, config_key)
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    plan.save_json(temp_path)
+    os.replace(temp_path, path)
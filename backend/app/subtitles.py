@@ -0,0 +1,100 @@
+import io
+from array import array
+from collections import namedtuple
+
+# Start/end are integer milliseconds; text is the cue's lines joined by single spaces
+Cue = namedtuple("Cue", ["start", "end", "text"])
+
+
+def parse_srt_time(value):
+    """Converts "HH:MM:SS,mmm" (or "." as separator, or without hours) to integer milliseconds."""
+    clock, _, fraction = value.strip().replace(".", ",").partition(",")
+    parts = [int(part) for part in clock.split(":")]
+    if not 1 <= len(parts) <= 3:
+        raise ValueError(f"Invalid timestamp format: {value}")
+    hours, minutes, seconds = [0] * (3 - len(parts)) + parts
+    milliseconds = int((fraction + "000")[:3]) if fraction else 0
+    return ((hours * 60 + minutes) * 60 + seconds) * 1000 + milliseconds
+
+
+def format_srt_time(milliseconds):
+    """Converts integer milliseconds to "HH:MM:SS,mmm"."""
+    seconds, milliseconds = divmod(int(milliseconds), 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+
+def _open_lines(source):
+    """Yields decoded lines from a path, a text stream or a binary stream (e.g. an upload)."""
+    if isinstance(source, (str, bytes)) or hasattr(source, "__fspath__"):
+        with open(source, "r", encoding="utf-8-sig", errors="replace", newline=None) as f:
+            yield from f
+    elif isinstance(source, io.TextIOBase):
+        for line in source:
+            yield line.lstrip("\ufeff")
+    else:
+        # Don't close the caller's stream when the wrapper is collected
+        wrapper = io.TextIOWrapper(source, encoding="utf-8-sig", errors="replace", newline=None)
+        try:
+            yield from wrapper
+        finally:
+            wrapper.detach()
+
+
+def iter_cues(source):
+    """Streams cues from an SRT source one block at a time, including a final block with no trailing blank line."""
+    start = end = None
+    text_lines = []
+
+    for line in _open_lines(source):
+        line = line.strip()
+        if "-->" in line:  # Timestamp line
+            start_text, _, end_text = line.partition("-->")
+            end_fields = end_text.split()
+            if not end_fields:
+                continue
+            start, end = parse_srt_time(start_text), parse_srt_time(end_fields[0])
+            text_lines = []
+        elif line == "":
+            if start is not None and text_lines:
+                yield Cue(start, end, " ".join(text_lines))
+            start = end = None
+            text_lines = []
+        elif start is not None:
+            text_lines.append(line)
+        # Anything else is a cue index line or stray text outside a cue
+
+    if start is not None and text_lines:
+        yield Cue(start, end, " ".join(text_lines))
+
+
+class CueColumns:
+    """Column-oriented cue storage for whole-file loads: two int64 arrays plus the texts."""
+
+    __slots__ = ("starts", "ends", "texts")
+
+    def __init__(self, cues=()):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.texts = []
+        for cue in cues:
+            self.append(cue)
+
+    def append(self, cue):
+        self.starts.append(cue.start)
+        self.ends.append(cue.end)
+        self.texts.append(cue.text)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __getitem__(self, index):
+        return Cue(self.starts[index], self.ends[index], self.texts[index])
+
+    def __iter__(self):
+        return map(Cue, self.starts, self.ends, self.texts)
+
+
+def load_cue_columns(source):
+    return CueColumns(iter_cues(source))
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+import uuid
+from dotenv import load_dotenv
+from .utils import BASE_DIR
+from .storage import store_file
+from .clips import FFPROBE_PATH
+
+load_dotenv()
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR") or os.path.join(BASE_DIR, "..", "uploads")
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))
+UPLOAD_WRITE_SIZE = 1024 * 1024
+# Probe the container once this much of a video has arrived
+UPLOAD_PROBE_BYTES = int(os.getenv("UPLOAD_PROBE_BYTES", str(4 * 1024 * 1024)))
+# Uploads with no write for this long are removed
+UPLOAD_TTL_SECONDS = int(os.getenv("UPLOAD_TTL_SECONDS", str(24 * 3600)))
+UPLOAD_SWEEP_INTERVAL = 3600
+
+
+class UploadError(Exception):
+    """Raised for client-side upload protocol errors; carries the HTTP status to answer with."""
+
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _safe_filename(filename):
+    return re.sub(r"[^\w.\-]", "_", os.path.basename(filename or "upload"))
+
+
+class UploadSession:
+    """A resumable upload: a .part file (whose size is the acknowledged offset) plus a JSON metadata file."""
+
+    # Running hashes of in-progress uploads in this process, keyed by upload id: (hasher, offset)
+    _hashers = {}
+    _hashers_lock = threading.Lock()
+
+    def __init__(self, upload_id, meta):
+        self.upload_id = upload_id
+        self.meta = meta
+
+    @staticmethod
+    def _meta_path(upload_id):
+        return os.path.join(UPLOAD_DIR, f"{upload_id}.json")
+
+    @property
+    def part_path(self):
+        return os.path.join(UPLOAD_DIR, f"{self.upload_id}.part")
+
+    @classmethod
+    def create(cls, user_id, filename, total_size, sha256=None):
+        if total_size is None or total_size < 0:
+            raise UploadError(400, "total_size must be a non-negative number of bytes")
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        session = cls(uuid.uuid4().hex, {
+            "user_id": user_id,
+            "filename": _safe_filename(filename),
+            "total_size": total_size,
+            "sha256": sha256.lower() if sha256 else None,
+            "probe": None,
+        })
+        open(session.part_path, "wb").close()
+        session._save_meta()
+        return session
+
+    @classmethod
+    def load(cls, upload_id, user_id):
+        if not re.fullmatch(r"[0-9a-f]{32}", upload_id):
+            raise UploadError(404, "Upload not found")
+        try:
+            with open(cls._meta_path(upload_id), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            raise UploadError(404, "Upload not found")
+        if meta["user_id"] != user_id:
+            raise UploadError(404, "Upload not found")
+        return cls(upload_id, meta)
+
+    def _save_meta(self):
+        tmp_path = self._meta_path(self.upload_id) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self._meta_path(self.upload_id))
+
+    @property
+    def offset(self):
+        return os.path.getsize(self.part_path)
+
+    def status(self):
+        offset = self.offset
+        return {
+            "upload_id": self.upload_id,
+            "filename": self.meta["filename"],
+            "offset": offset,
+            "total_size": self.meta["total_size"],
+            "chunk_size": UPLOAD_CHUNK_SIZE,
+            "complete": offset == self.meta["total_size"],
+            "probe": self.meta.get("probe"),
+        }
+
+    def _hasher(self, offset):
+        """Returns the running hash at offset, rebuilding it from the part file after a restart."""
+        with self._hashers_lock:
+            hasher, hashed = self._hashers.get(self.upload_id, (None, -1))
+        if hashed != offset:
+            hasher = hashlib.sha256()
+            with open(self.part_path, "rb") as f:
+                for block in iter(lambda: f.read(UPLOAD_WRITE_SIZE), b""):
+                    hasher.update(block)
+        return hasher
+
+    def open_writer(self, offset):
+        """Opens the part file for appending a chunk at offset; blocking, call off the event loop."""
+        current = self.offset
+        if offset != current:
+            raise UploadError(409, f"Expected offset {current}")
+        return open(self.part_path, "ab"), self._hasher(current)
+
+    def write_block(self, writer, hasher, block):
+        """Appends one block; blocking, call off the event loop."""
+        if self.offset + len(block) > self.meta["total_size"]:
+            raise UploadError(413, "Upload exceeds the declared total_size")
+        writer.write(block)
+        writer.flush()
+        hasher.update(block)
+
+    def finish_chunk(self, writer, hasher):
+        """Closes the chunk writer, remembers the running hash and kicks off probing once enough has landed."""
+        writer.close()
+        offset = self.offset
+        with self._hashers_lock:
+            self._hashers[self.upload_id] = (hasher, offset)
+        is_subtitle = self.meta["filename"].lower().endswith(".srt")
+        if not is_subtitle and self.meta.get("probe") is None and offset >= min(UPLOAD_PROBE_BYTES, self.meta["total_size"]):
+            self.meta["probe"] = {"status": "pending"}
+            self._save_meta()
+            threading.Thread(target=self._probe, daemon=True).start()
+        return offset
+
+    def _probe(self):
+        """Reads container/stream info from the partial file; MP4s with a trailing moov may only probe once complete."""
+        command = [FFPROBE_PATH, "-v", "error", "-show_entries", "format=format_name,duration:stream=codec_type,codec_name,width,height",
+                   "-of", "json", self.part_path]
+        try:
+            result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=30)
+            if result.returncode == 0:
+                probe = {"status": "ok", **json.loads(result.stdout)}
+            else:
+                probe = {"status": "unavailable", "error": result.stderr.strip()[-500:]}
+        except (OSError, subprocess.TimeoutExpired, ValueError) as e:
+            probe = {"status": "unavailable", "error": str(e)}
+        try:
+            # Re-read so a concurrent metadata write is not lost
+            self.meta = self.load(self.upload_id, self.meta["user_id"]).meta
+        except UploadError:
+            return  # Completed or discarded meanwhile
+        self.meta["probe"] = probe
+        self._save_meta()
+
+    def complete(self, db):
+        """Verifies size and hash, then stores the file by content hash; blocking, call off the event loop."""
+        offset = self.offset
+        if offset != self.meta["total_size"]:
+            raise UploadError(409, f"Upload incomplete: {offset} of {self.meta['total_size']} bytes received")
+
+        digest = self._hasher(offset).hexdigest()
+        if self.meta["sha256"] and digest != self.meta["sha256"]:
+            raise UploadError(422, "Uploaded content does not match the declared sha256")
+
+        filename = store_file(db, self.part_path, digest, self.meta["filename"])
+        self.discard()
+        return {"file": filename, "sha256": digest, "size": offset}
+
+    def discard(self):
+        with self._hashers_lock:
+            self._hashers.pop(self.upload_id, None)
+        for path in (self.part_path, self._meta_path(self.upload_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def expire_uploads(ttl=UPLOAD_TTL_SECONDS):
+    """Removes the files of uploads untouched for ttl seconds; blocking, call off the event loop."""
+    try:
+        names = os.listdir(UPLOAD_DIR)
+    except FileNotFoundError:
+        return 0
+    last_activity = {}
+    for name in names:
+        upload_id = name.split(".", 1)[0]
+        try:
+            mtime = os.path.getmtime(os.path.join(UPLOAD_DIR, name))
+        except FileNotFoundError:
+            continue
+        last_activity[upload_id] = max(mtime, last_activity.get(upload_id, 0))
+
+    cutoff = time.time() - ttl
+    expired = [upload_id for upload_id, mtime in last_activity.items() if mtime < cutoff]
+    for upload_id in expired:
+        with UploadSession._hashers_lock:
+            UploadSession._hashers.pop(upload_id, None)
+        for name in names:
+            if name.split(".", 1)[0] == upload_id:
+                try:
+                    os.remove(os.path.join(UPLOAD_DIR, name))
+                except FileNotFoundError:
+                    pass
+    if expired:
+        print(f"Expired {len(expired)} abandoned upload(s)")
+    return len(expired)
@@ -1,311 +1,192 @@
 from passlib.context import CryptContext
-from transformers import pipeline
-import re
-import subprocess
 import os
 import time
-from datetime import datetime, timedelta
-import uuid
+import hashlib
+import json
+from array import array
+import numpy as np
+from .keywords import EXCITING_KEYWORDS, HIGH_IMPACT_KEYWORDS, BORING_KEYWORDS, KEYWORD_INDEX
+from .subtitles import load_cue_columns
+from .intervals import pad_intervals, snap_intervals
+from .plan import HighlightPlan
+from .clips import create_clips
+from .sentiment import score_texts, registry, SENTIMENT_BATCH_SIZE, SENTIMENT_MAX_LENGTH
+from .audio import AUDIO_ENABLED
+from . import metrics
+from .shots import SHOTS_ENABLED, SHOT_FPS, SHOT_THRESHOLD, SHOT_SNAP_TOLERANCE_MS
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC_DIR = os.path.join(BASE_DIR, "..", "static")
+CACHE_DIR = os.getenv("CACHE_DIR") or os.path.join(BASE_DIR, "..", "cache")
+
+# "cascade" only runs the model on cues the keywords leave undecided, "full" scores every cue
+SCORING_MODE = os.getenv("SCORING_MODE", "cascade")
+
+HIGH_IMPACT_PADDING_MS = 5000
+EXCITING_PADDING_MS = 2000
+MERGE_GAP_MS = 3000
+# A cue is exciting by sentiment alone at this rating (1-5) and confidence
+EXCITING_RATING = 4
+EXCITING_CONFIDENCE = 0.6
+# Crowd noise blended with the sentiment score; a cue the text alone does not keep is kept when the blend reaches AUDIO_EXCITING_SCORE
+AUDIO_WEIGHT = float(os.getenv("AUDIO_WEIGHT", "0.4"))
+AUDIO_EXCITING_SCORE = float(os.getenv("AUDIO_EXCITING_SCORE", "0.6"))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+def hash_password(password) :
+    return pwd_context.hash(password)
+
 def verify_password(plain_password, hashed_password) :
     return pwd_context.verify(plain_password, hashed_password)
 
-EXCITING_KEYWORDS = {
-        "goal", "scored", "winning", "champion", "shoot", "shot", "attack", "dribble", "tackle",  
-        "strike", "header", "corner", "free-kick", "penalty", "save", "offside", "counterattack",  
-        "equalizer", "hat-trick", "celebration", "cheer", "roar", "thrilling", "sensational",  
-        "brilliant", "amazing", "unbelievable", "stunning", "spectacular", "breathtaking",  
-        "incredible", "comeback", "last-minute", "injury-time", "extra-time", "pressure",  
-        "intense", "electric", "frenzy", "fast-paced", "end-to-end", "breakaway", "unstoppable",  
-        "masterclass", "legendary", "heroic", "explosive", "wild", "epic", "drama", "magnificent",  
-        "blockbuster", "thunderous", "volley", "half-volley", "bicycle-kick", "chip", "curling",  
-        "dazzling", "finesse", "powerful", "blistering", "world-class", "red-card", "yellow-card",  
-        "foul", "controversial", "VAR", "heart-stopping", "nail-biting", "edge-of-seat", "relentless",  
-        "dominance", "flawless", "decisive", "magic", "triumph", "rivalry", "undefeated",  
-        "gutsy", "miraculous", "roaring", "breakthrough", "highlight", "unstoppable", "unstoppable-run",  
-        "backheel", "nutmeg", "long-range", "wonder-goal", "screamer", "rocket", "unstoppable-shot",  
-        "top-corner", "worldie", "brilliant-save", "last-gasp", "title-decider", "underdog-victory",  
-        "record-breaking", "unstoppable-form", "unstoppable-strike", "moment-of-magic"
+def scoring_config_key():
+    """Hash of everything that changes analyze_excitement's output for a given subtitle file."""
+    config = {
+        "model": registry.model_id,
+        "max_length": SENTIMENT_MAX_LENGTH,
+        "keywords": [sorted(EXCITING_KEYWORDS), sorted(HIGH_IMPACT_KEYWORDS), sorted(BORING_KEYWORDS)],
+        "rating": EXCITING_RATING,
+        "confidence": EXCITING_CONFIDENCE,
+        "padding": [HIGH_IMPACT_PADDING_MS, EXCITING_PADDING_MS],
+        "merge_gap": MERGE_GAP_MS,
+        "audio": [AUDIO_WEIGHT, AUDIO_EXCITING_SCORE] if AUDIO_ENABLED else None,
+        "shots": [SHOT_FPS, SHOT_THRESHOLD, SHOT_SNAP_TOLERANCE_MS] if SHOTS_ENABLED else None,
     }
-
-HIGH_IMPACT_KEYWORDS = {
-    "goal", "scored", "penalty", "red card", "yellow card", "free kick", 
-    "corner", "VAR", "equalizer", "last-minute", "extra-time", "injury-time"
-}
-
-BORING_KEYWORDS = {
-        "goalless", "draw", "dull", "slow", "boring", "lackluster", "passive", "uneventful", "mundane",  
-        "predictable", "stagnant", "lifeless", "tedious", "pointless", "disappointing", "underwhelming",  
-        "missed", "off-target", "sideways", "backpass", "defensive", "cautious", "meaningless",  
-        "scoreless", "static", "half-hearted", "weak", "sloppy", "mistake", "error", "misplaced",  
-        "poor", "underperforming", "time-wasting", "delay", "long-ball", "scrappy", "stretched",  
-        "slow-tempo", "exhausted", "foul-filled", "stoppage", "injury-break", "out-of-form", "routine",  
-        "unambitious", "tired", "wasteful", "long-spell", "no-attacking-intent", "midfield-battle",  
-        "low-energy", "inconsistent", "pass-heavy", "aimless", "non-threatening", "predictable-passing",  
-        "offside-trap", "possession-based", "no-clear-chances", "low-intensity", "one-sided",  
-        "overhit", "underhit", "overcautious", "deep-block", "meaningless-possession", "cagey",  
-        "conservative", "out-of-ideas", "low-block", "park-the-bus", "counterproductive",  
-        "negative-play", "uninspired", "dry-spell", "few-opportunities", "no-shots-on-target",  
-        "defensive-minded", "wasted-opportunities", "shutout", "midfield-clog", "passive-pressing",  
-        "drained", "time-wasting-tactics", "holding-shape", "recycled-passing", "safe-play",  
-        "lacking-creativity", "few-highlights", "excessive-passing", "non-clinical", "careless",  
-        "missed-sitter", "out-of-sync", "poor-control", "miscommunication", "slow-buildup",  
-        "low-risk", "lack-of-movement", "rigid", "lacking-intensity", "possession-without-purpose"
-    };
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
 
 def load_subtitles(subtitle_file):
+    """Loads a whole SRT file (path or stream) into array-backed cue columns with millisecond times."""
     print("Loading subtitles...")
     start_time = time.time()
 
-    with open(subtitle_file, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    subtitles = []
-    current_subtitle = {"start": None, "end": None, "text": ""}
-
-    for line in lines:
-        line = line.strip()
-        if "-->" in line:  # Timestamp line
-            times = line.split(" --> ")
-            current_subtitle["start"] = times[0]
-            current_subtitle["end"] = times[1]
-        elif line == "":
-            if current_subtitle["start"] and current_subtitle["text"]:
-                subtitles.append(current_subtitle)
-                current_subtitle = {"start": None, "end": None, "text": ""}
-        else:
-            current_subtitle["text"] += " " + line
+    with metrics.timer("highlighter_stage_seconds", stage="parse"):
+        subtitles = load_cue_columns(subtitle_file)
 
     print(f"Subtitles loaded. Total subtitles: {len(subtitles)} (Time: {time.time() - start_time:.2f} sec)")
     return subtitles
 
-def analyze_excitement(subtitles):
-    """Identifies exciting moments using sentiment & keyword analysis."""
-    
-    print("\nInitializing sentiment analysis model...")
-    model_load_time = time.time()
-    sentiment_pipeline = pipeline("sentiment-analysis", model="nlptown/bert-base-multilingual-uncased-sentiment")
-    print(f"Model loaded successfully. (Time: {time.time() - model_load_time:.2f} sec)")
-
-    exciting_timestamps = []
-    print("\nAnalyzing subtitles for excitement...")
-    analysis_start_time = time.time()
-
-    for i, subtitle in enumerate(subtitles):
-        text = subtitle["text"].lower()
-        start_time = subtitle["start"]
-        end_time = subtitle["end"]
-
-        # Check if text contains exciting or high-impact keywords
-        contains_exciting_word = any(word in text for word in EXCITING_KEYWORDS)
-        contains_high_impact_word = any(word in text for word in HIGH_IMPACT_KEYWORDS)
-        contains_boring_word = any(word in text for word in BORING_KEYWORDS)
+def cue_audio_score(audio_energy, start_ms, end_ms):
+    """Loudest second of crowd noise during a cue; 0 outside the audio track."""
+    first = int(start_ms) // 1000
+    last = max(first, (int(end_ms) - 1) // 1000)
+    window = audio_energy[first:last + 1]
+    return float(window.max()) if len(window) else 0.0
 
-        # Sentiment analysis
-        result = sentiment_pipeline(text)[0]
-        rating = int(result["label"][0])  # Extract numeric rating (1-5 scale)
-        confidence = result["score"]
+def analyze_excitement(subtitles, sentiment_pipeline=None, batch_size=SENTIMENT_BATCH_SIZE, mode=SCORING_MODE, stats=None, duration_ms=None, audio_energy=None, shot_boundaries=None):
+    """Identifies exciting moments using sentiment & keyword analysis.
 
-        # Determine if this subtitle is exciting
-        is_exciting = (rating >= 4 and confidence > 0.6) or contains_exciting_word
-        is_high_impact = contains_high_impact_word
-        is_boring = contains_boring_word
+    In "cascade" mode the keyword stage settles every cue that is kept regardless of
+    sentiment (exciting or high-impact keyword) and only the remaining cues reach the model.
+    "full" mode scores every cue. Both produce the same timestamps.
 
-        # Adjust timestamps if exciting or high impact
-        if is_exciting or is_high_impact:
-            adjusted_start, adjusted_end = adjust_timestamps(start_time, end_time, is_high_impact)
-            exciting_timestamps.append((adjusted_start, adjusted_end))
-            
-        print(f"Text: {text}\nRating: {rating}, Confidence: {confidence:.4f}, Exciting: {is_exciting}, High Impact: {is_high_impact}, Boring: {is_boring}\n")
+    With audio_energy (per-second crowd noise in [0, 1]) cues the text does not keep are
+    still kept when the weighted blend of sentiment and crowd noise is high enough.
+    With shot_boundaries (sorted ms) padded edges snap to the nearest cut before merging.
 
-        # Log progress every 10 subtitles
-        if i % 10 == 0:
-            print(f"Processed {i+1}/{len(subtitles)} subtitles...")
-
-    print(f"Excitement analysis completed. (Time: {time.time() - analysis_start_time:.2f} sec)")
-    return merge_overlapping_timestamps(exciting_timestamps)
-
-def adjust_timestamps(start, end, is_high_impact):
-    """Extends timestamps for crucial moments."""
-    start_dt = datetime.strptime(start, "%H:%M:%S,%f")
-    end_dt = datetime.strptime(end, "%H:%M:%S,%f")
-
-    if is_high_impact:
-        start_dt -= timedelta(seconds=5)  # Extend earlier for buildup
-        end_dt += timedelta(seconds=5)  # Extend later for aftermath
-        print(f"High Impact: {start_dt.strftime('%H:%M:%S,%f')[:-3]} - {end_dt.strftime('%H:%M:%S,%f')[:-3]}")
-    else:
-        start_dt -= timedelta(seconds=2)  # Normal excitement: slight extension
-        end_dt += timedelta(seconds=2)
+    Returns a HighlightPlan of merged intervals with their scores and reasons.
+    """
 
-    return start_dt.strftime("%H:%M:%S,%f")[:-3], end_dt.strftime("%H:%M:%S,%f")[:-3]
-
-def merge_overlapping_timestamps(timestamps):
-    """Merges overlapping timestamps into continuous highlights."""
-    if not timestamps:
-        return []
-
-    merged_timestamps = []
-    timestamps.sort()  # Ensure chronological order
-
-    current_start, current_end = timestamps[0]
-
-    for next_start, next_end in timestamps[1:]:
-        current_end_dt = datetime.strptime(current_end, "%H:%M:%S,%f")
-        next_start_dt = datetime.strptime(next_start, "%H:%M:%S,%f")
-        next_end_dt = datetime.strptime(next_end, "%H:%M:%S,%f")
-
-        # If timestamps overlap or are within 3 seconds, merge them
-        if next_start_dt <= current_end_dt + timedelta(seconds=3):
-            current_end = max(current_end, next_end)  # Extend current segment
-            print(f"Merged: {current_start} - {current_end}")
-        else:
-            merged_timestamps.append((current_start, current_end))
-            current_start, current_end = next_start, next_end
-
-    merged_timestamps.append((current_start, current_end))
-    return merged_timestamps
+    exciting_starts, exciting_ends, exciting_high_impact = array("q"), array("q"), []
+    exciting_scores, exciting_reasons = [], []
+    print("\nAnalyzing subtitles for excitement...")
+    analysis_start_time = time.time()
 
-def save_timestamps(timestamps, output_file="high_sentiment.txt"):
-    """Saves timestamps of high-excitement moments to a file."""
-    with open(output_file, "w") as f:
-        for start, end in timestamps:
-            f.write(f"{start},{end}\n")
+    # Keyword stage
+    with metrics.timer("highlighter_stage_seconds", stage="keywords"):
+        texts = [subtitle.text.lower() for subtitle in subtitles]
+        keyword_hits = [KEYWORD_INDEX.match(text) for text in texts]
+    metrics.inc("highlighter_cues_total", len(texts))
 
-    print(f"\nSaved {len(timestamps)} timestamps to {output_file}")
-    
-def convert_to_seconds(timestamp):
-    """Converts timestamp in hh:mm:ss,SSS format to seconds."""
-    time_pattern = r"(\d{2}):(\d{2}):(\d{2}),(\d{3})"
-    match = re.match(time_pattern, timestamp)
-    if match:
-        hours, minutes, seconds, milliseconds = match.groups()
-        total_seconds = int(hours) * 3600 + int(minutes) * 60 + int(seconds) + int(milliseconds) / 1000
-        return total_seconds
+    if mode == "cascade":
+        ambiguous = [i for i, hits in enumerate(keyword_hits) if not hits.exciting and not hits.high_impact]
     else:
-        raise ValueError(f"Invalid timestamp format: {timestamp}")
-    
-def create_clips(input_file, timestamps_file, output_folder):
-    start_time = time.time()
-    print("Starting video processing...")
+        ambiguous = list(range(len(texts)))
 
-    os.makedirs(output_folder, exist_ok=True)
-
-    timestamps = []
-    with open(timestamps_file, 'r') as f:
-        for line in f:
-            parts = line.strip().split(',')
-            if len(parts) < 4:
-                print(f"Skipping invalid line: {line.strip()}")
-                continue  
-            
-            start = ','.join(parts[:2])  
-            end = ','.join(parts[2:])    
+    # Sentiment analysis, batched over the cues the keywords could not decide
+    scores = [None] * len(texts)
+    for i, score in zip(ambiguous, score_texts([texts[i] for i in ambiguous], sentiment_pipeline, batch_size=batch_size)):
+        scores[i] = score
 
-            start_seconds = convert_to_seconds(start)
-            end_seconds = convert_to_seconds(end)
-            timestamps.append((start_seconds, end_seconds))
+    skipped = len(texts) - len(ambiguous)
+    print(f"Sentiment scored for {len(ambiguous)} subtitles, {skipped} decided by keywords ({mode} mode). (Time: {time.time() - analysis_start_time:.2f} sec)")
+    metrics.inc("highlighter_model_inferences_total", len(ambiguous))
+    metrics.inc("highlighter_model_inferences_skipped_total", skipped)
+    if stats is not None:
+        stats.update({"cues": len(texts), "model_inferences": len(ambiguous), "skipped_inferences": skipped})
 
-    print(f"Parsed timestamps: {timestamps}")
-
-    segment_paths = []  
-    ffmpeg_path = r"C:\\ProgramData\\chocolatey\\bin\\ffmpeg.exe"
+    for i, subtitle in enumerate(subtitles):
+        text = texts[i]
 
-    for idx, (start, end) in enumerate(timestamps):
-        segment_uuid = uuid.uuid4()  # Generate unique filename
-        output_file = os.path.join(output_folder, f"{segment_uuid}.mp4")
+        # Check if text contains exciting or high-impact keywords
+        contains_exciting_word = bool(keyword_hits[i].exciting)
+        contains_high_impact_word = bool(keyword_hits[i].high_impact)
+        contains_boring_word = bool(keyword_hits[i].boring)
 
-        command = [
-            ffmpeg_path,
-            '-i', input_file,
-            '-ss', str(start),
-            '-to', str(end),
-            '-c:v', 'libx264',
-            '-c:a', 'aac',
-            '-y', output_file
-        ]
-        
-        try:
-            print(f"Creating segment {idx+1}: {start}s to {end}s")
-            process_start_time = time.time()
-            subprocess.run(command, check=True)
-            process_end_time = time.time()
-            print(f"Segment {idx+1} created: {output_file}")
-            print(f"FFmpeg execution time: {process_end_time - process_start_time:.2f} seconds")
-            segment_paths.append(output_file)  
-        except subprocess.CalledProcessError as e:
-            print(f"Error occurred while processing segment {idx+1}: {e}")
+        rating, confidence = scores[i] if scores[i] is not None else (None, None)
 
-    end_time = time.time()
-    print(f"Total processing time: {end_time - start_time:.2f} seconds")
+        # Determine if this subtitle is exciting
+        is_sentiment_exciting = rating is not None and rating >= EXCITING_RATING and confidence > EXCITING_CONFIDENCE
+        is_exciting = is_sentiment_exciting or contains_exciting_word
+        is_high_impact = contains_high_impact_word
+        is_boring = contains_boring_word
 
-    return segment_paths  # Return the list of segment files
-    
-def trim_video(input_file, timestamps_file, output_folder):
-    start_time = time.time()
-    print("Starting video processing...")
-    
-    # Ensure output folder exists
-    os.makedirs(output_folder, exist_ok=True)
+        # Crowd noise can lift a cue the text leaves undecided
+        is_audio_exciting = False
+        if audio_energy is not None and not (is_exciting or is_high_impact):
+            sentiment_score = rating / 5 * confidence if rating is not None else 0.0
+            audio_score = (1 - AUDIO_WEIGHT) * sentiment_score + AUDIO_WEIGHT * cue_audio_score(audio_energy, subtitle.start, subtitle.end)
+            is_audio_exciting = audio_score >= AUDIO_EXCITING_SCORE
+            is_exciting = is_audio_exciting
 
-    # Read timestamps from the file
-    timestamps = []
-    with open(timestamps_file, 'r') as f:
-        for line in f:
-            parts = line.strip().split(',')
-            if len(parts) < 4:
-                print(f"Skipping invalid line: {line.strip()}")
-                continue  # Skip invalid lines
-            
-            start = ','.join(parts[:2])  # Join first two parts for start time
-            end = ','.join(parts[2:])    # Join last two parts for end time
+        # Keep the cue if exciting or high impact
+        if is_exciting or is_high_impact:
+            exciting_starts.append(subtitle.start)
+            exciting_ends.append(subtitle.end)
+            exciting_high_impact.append(is_high_impact)
+            # Keyword decisions outrank the model; sentiment scores scale with rating and confidence
+            if is_high_impact:
+                exciting_scores.append(1.0)
+            elif contains_exciting_word:
+                exciting_scores.append(0.9)
+            elif is_audio_exciting:
+                exciting_scores.append(audio_score)
+            else:
+                exciting_scores.append(rating / 5 * confidence)
+            reasons = [f"keyword:{keyword}" for keyword in keyword_hits[i].exciting | keyword_hits[i].high_impact]
+            if is_sentiment_exciting:
+                reasons.append("sentiment")
+            if is_audio_exciting:
+                reasons.append("audio")
+            exciting_reasons.append(reasons)
             
-            start_seconds = convert_to_seconds(start)
-            end_seconds = convert_to_seconds(end)
-            timestamps.append((start_seconds, end_seconds))
+        # Per-cue detail only at LOG_LEVEL=debug; formatting it for every cue is not free
+        if metrics.DEBUG:
+            sentiment_log = f"Rating: {rating}, Confidence: {confidence:.4f}" if rating is not None else "Rating: skipped"
+            metrics.debug(f"Text: {text}\n{sentiment_log}, Exciting: {is_exciting}, High Impact: {is_high_impact}, Boring: {is_boring}\n")
+
+            # Log progress every 10 subtitles
+            if i % 10 == 0:
+                metrics.debug(f"Processed {i+1}/{len(subtitles)} subtitles...")
+
+    with metrics.timer("highlighter_stage_seconds", stage="merge"):
+        adjusted_starts, adjusted_ends = adjust_timestamps(exciting_starts, exciting_ends, exciting_high_impact, duration_ms)
+        # Cues at or past the end of the video clamp to empty windows; drop them with their scores and reasons
+        kept = adjusted_starts < adjusted_ends
+        if not kept.all():
+            adjusted_starts, adjusted_ends = adjusted_starts[kept], adjusted_ends[kept]
+            exciting_scores = [score for score, keep in zip(exciting_scores, kept.tolist()) if keep]
+            exciting_reasons = [reasons for reasons, keep in zip(exciting_reasons, kept.tolist()) if keep]
+        if shot_boundaries is not None:
+            # Clips then start and end on a cut instead of mid-shot
+            adjusted_starts, adjusted_ends = snap_intervals(adjusted_starts, adjusted_ends, shot_boundaries, SHOT_SNAP_TOLERANCE_MS)
+        plan = HighlightPlan.from_cues(adjusted_starts, adjusted_ends, exciting_scores, exciting_reasons, MERGE_GAP_MS)
 
-    print(f"Parsed timestamps: {timestamps}")
-    
-    video_filters = []
-    audio_filters = []
-    
-    for idx, (start, end) in enumerate(timestamps):
-        print(f"Processing segment {idx+1}: {start}s to {end}s")
-        video_filters.append(f"[0:v]trim=start={start}:end={end},setpts=PTS-STARTPTS[v{idx}]")
-        audio_filters.append(f"[0:a]atrim=start={start}:end={end},asetpts=PTS-STARTPTS[a{idx}]")
+    print(f"Excitement analysis completed. (Time: {time.time() - analysis_start_time:.2f} sec)")
+    return plan
 
-    concat_video = f"{''.join([f'[v{idx}]' for idx in range(len(timestamps))])}concat=n={len(timestamps)}:v=1:a=0[vout]"
-    concat_audio = f"{''.join([f'[a{idx}]' for idx in range(len(timestamps))])}concat=n={len(timestamps)}:v=0:a=1[aout]"
-    
-    filter_complex = ";".join(video_filters + audio_filters + [concat_video, concat_audio, "[vout][aout]concat=n=1:v=1:a=1[outv][outa]"])
-    
-    final_output = os.path.join(output_folder, "final_output.mp4")
-    
-    ffmpeg_path = r"C:\\ProgramData\\chocolatey\\bin\\ffmpeg.exe"
-    
-    command = [
-        ffmpeg_path,
-        '-i', input_file,
-        '-filter_complex', filter_complex,
-        '-map', '[outv]',
-        '-map', '[outa]',
-        '-c:v', 'libx264',
-        '-c:a', 'aac',
-        '-y',
-        final_output
-    ]
-    
-    try:
-        print("Running FFmpeg command...")
-        process_start_time = time.time()
-        subprocess.run(command, check=True)
-        process_end_time = time.time()
-        print(f"Successfully created the final concatenated video: {final_output}")
-        print(f"FFmpeg execution time: {process_end_time - process_start_time:.2f} seconds")
-    except subprocess.CalledProcessError as e:
-        print(f"Error occurred while processing the video: {e}")
-    
-    end_time = time.time()
-    print(f"Total processing time: {end_time - start_time:.2f} seconds")
\ No newline at end of file
+def adjust_timestamps(starts, ends, is_high_impact, duration_ms=None):
+    """Extends highlight windows (millisecond arrays) for crucial moments, clamped to the video."""
+    # High impact gets more buildup and aftermath than normal excitement
+    padding = np.where(is_high_impact, HIGH_IMPACT_PADDING_MS, EXCITING_PADDING_MS)
+    return pad_intervals(starts, ends, padding, padding, duration_ms)
@@ -35,7 +35,37 @@ const Editor = () => {
     }
   };
 
-  const getSegments = () => {
+  // Sends a file in chunks through the resumable upload endpoints, resuming from the server's offset after a failure
+  const uploadFile = async (file) => {
+    const headers = { Authorization: `Bearer ${localStorage.getItem("token")}` };
+    const { data: upload } = await api.post(
+      "/uploads",
+      { filename: file.name, total_size: file.size },
+      { headers }
+    );
+
+    let offset = upload.offset;
+    let retries = 0;
+    while (offset < file.size) {
+      const chunk = file.slice(offset, offset + upload.chunk_size);
+      try {
+        const { data } = await api.put(`/uploads/${upload.upload_id}?offset=${offset}`, chunk, {
+          headers: { ...headers, "Content-Type": "application/octet-stream" },
+        });
+        offset = data.offset;
+        retries = 0;
+      } catch (error) {
+        if (++retries > 5) throw error;
+        const { data } = await api.get(`/uploads/${upload.upload_id}`, { headers });
+        offset = data.offset;
+      }
+    }
+
+    const { data: completed } = await api.post(`/uploads/${upload.upload_id}/complete`, null, { headers });
+    return completed.file;
+  };
+
+  const getSegments = async () => {
     if (!videoFile || !subtitleFile) {
       toast.error("Please select both video and subtitle files.");
       return;
@@ -43,25 +73,50 @@ const Editor = () => {
 
     setLoading(true);
 
-    // Create FormData object
-    const formData = new FormData();
-    formData.append("video", videoFile);
-    formData.append("subtitle", subtitleFile);
+    try {
+      const [video, subtitle] = await Promise.all([uploadFile(videoFile), uploadFile(subtitleFile)]);
+      const response = await api.post(
+        "/create_segments/uploaded/",
+        { video, subtitle },
+        {
+          headers: {
+            Authorization: `Bearer ${localStorage.getItem("token")}`,
+          },
+        }
+      );
+      console.log(response.data);
+      localStorage.setItem("lastVideo", response.data.video_url);
+      localStorage.setItem("lastJob", response.data.job_id);
+      pollJob(response.data.job_id);
+    } catch (error) {
+      console.error("Error generating highlights:", error);
+      toast.error("Failed to generate highlights.");
+      setLoading(false);
+    }
+  };
 
+  // Segments are created by a background job; poll it until it finishes
+  const pollJob = (jobId) => {
     api
-      .post("/create_segments", formData, {
+      .get(`/jobs/${jobId}`, {
         headers: {
-          "Content-Type": "multipart/form-data", // Ensure correct content type
           Authorization: `Bearer ${localStorage.getItem("token")}`,
         },
       })
       .then((response) => {
-        console.log(response.data);
-        setData(response.data);
-        localStorage.setItem("lastVideo", response.data.video_url);
-        toast.success("Highlights generated successfully!");
-        setLoading(false);
-        setSegmentGenerated(true);
+        const job = response.data;
+        if (job.status === "done") {
+          setData(job.result);
+          toast.success("Highlights generated successfully!");
+          setLoading(false);
+          setSegmentGenerated(true);
+        } else if (job.status === "failed") {
+          console.error("Error generating highlights:", job.error);
+          toast.error("Failed to generate highlights.");
+          setLoading(false);
+        } else {
+          setTimeout(() => pollJob(jobId), 3000);
+        }
       })
       .catch((error) => {
         console.error("Error generating highlights:", error);
@@ -192,6 +247,26 @@ const Editor = () => {
                 </div>
               )}
             </div>
+            {/* First thumbnail of each segment's sprite sheet; no full-res video is loaded here */}
+            {data?.segment_previews?.some((preview) => preview) && (
+              <div className="flex flex-wrap justify-center gap-2 max-w-3xl">
+                {data.segment_previews.map(
+                  (preview, index) =>
+                    preview && (
+                      <div
+                        key={index}
+                        className="rounded-md"
+                        style={{
+                          width: 160,
+                          height: 90,
+                          backgroundImage: `url(http://localhost:8000/media/${preview.sprite})`,
+                          backgroundPosition: "0 0",
+                        }}
+                      />
+                    )
+                )}
+              </div>
+            )}
             <button
               onClick={() => nav("/highlights")}
               className="bg-main text-white px-10 py-5 rounded-md  text-xl duration-200 transition-all cursor-pointer mt-5"
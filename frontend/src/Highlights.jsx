@@ -14,10 +14,11 @@ const Highlights = () => {
   const [finished, setFinished] = useState(false);
   const [finalVideo, setFinalVideo] = useState(null);
 
-  const videoName = localStorage.getItem("lastVideo");
+  // Segments belong to the job that made them; the video name is shared by identical uploads
+  const jobId = localStorage.getItem("lastJob");
 
   useEffect(() => {
-    if (!videoName) {
+    if (!jobId) {
       toast.error("No video found. Upload a video first.");
       nav("/");
       return;
@@ -28,8 +29,18 @@ const Highlights = () => {
   const fetchSegments = async () => {
     setLoading(true);
     try {
-      const response = await api.get(`/segments/video/${videoName}`);
-      setSegments(response.data);
+      // Segments come in keyset pages; follow the cursor until the last page
+      let page = { has_more: true, next_cursor: null };
+      const items = [];
+      while (page.has_more) {
+        const response = await api.get(`/segments/job/${jobId}`, {
+          params: { cursor: page.next_cursor ?? undefined, limit: 200 },
+          headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
+        });
+        page = response.data;
+        items.push(...page.items);
+      }
+      setSegments(items);
       setLoading(false);
     } catch (error) {
       console.error("Error fetching segments:", error);
@@ -139,9 +150,11 @@ const Highlights = () => {
                 }`}
                 onClick={() => toggleSegment(segment.segment)}
               >
+                {/* Low-res proxy for picking clips; the full-res segment is only used for the final video */}
                 <video
-                  src={`http://localhost:8000/static/${segment.segment}`}
+                  src={`http://localhost:8000/media/${segment.proxy || segment.segment}`}
                   className="min-w-96 h-96 object-cover rounded-md"
+                  preload="metadata"
                   controls
                   muted
                 />
@@ -189,7 +202,7 @@ const Highlights = () => {
             Your Final Video is Ready!
           </div>
           <video
-            src={`http://localhost:8000/static/${finalVideo}`}
+            src={`http://localhost:8000/media/${finalVideo}`}
             controls
             className="w-2/3 rounded-md shadow-lg"
           />